@@ -0,0 +1,28 @@
+"""add_appointment_listing_index
+
+Revision ID: 0b6d2e9f4c18
+Revises: f5a3c8e6d921
+Create Date: 2026-10-18 16:48:05.215730
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0b6d2e9f4c18'
+down_revision: Union[str, Sequence[str], None] = 'f5a3c8e6d921'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_appointment_listing', 'appointment', ['date', 'start_min', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_appointment_listing', table_name='appointment')
@@ -0,0 +1,63 @@
+"""add_appointment_daily_rollup
+
+Revision ID: 1c7e4a2b9d35
+Revises: 0b6d2e9f4c18
+Create Date: 2026-10-18 17:34:20.981544
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1c7e4a2b9d35'
+down_revision: Union[str, Sequence[str], None] = '0b6d2e9f4c18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('appointment_daily_rollup',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('date', sa.Date(), nullable=False),
+    sa.Column('service_id', sa.Integer(), nullable=False),
+    sa.Column('staff_id', sa.Integer(), nullable=False),
+    sa.Column('pending', sa.Integer(), nullable=False),
+    sa.Column('confirmed', sa.Integer(), nullable=False),
+    sa.Column('cancelled', sa.Integer(), nullable=False),
+    sa.Column('no_show', sa.Integer(), nullable=False),
+    sa.Column('finished', sa.Integer(), nullable=False),
+    sa.Column('booked_min', sa.Integer(), nullable=False),
+    sa.Column('revenue_paid', sa.Float(), nullable=False),
+    sa.Column('revenue_unpaid', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['service_id'], ['service.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('date', 'service_id', 'staff_id', name='uq_appointment_daily_rollup_key')
+    )
+
+    # Backfill from the existing history (same aggregation as app.services.rollup.rebuild_rollup)
+    op.execute("""
+        INSERT INTO appointment_daily_rollup
+            (date, service_id, staff_id, pending, confirmed, cancelled, no_show, finished,
+             booked_min, revenue_paid, revenue_unpaid)
+        SELECT a.date, a.service_id, COALESCE(a.staff_id, 0),
+            COUNT(*) FILTER (WHERE a.status = 'PENDING'),
+            COUNT(*) FILTER (WHERE a.status = 'CONFIRMED'),
+            COUNT(*) FILTER (WHERE a.status = 'CANCELLED'),
+            COUNT(*) FILTER (WHERE a.status = 'NO_SHOW'),
+            COUNT(*) FILTER (WHERE a.status = 'FINISHED'),
+            COALESCE(SUM(a.end_min - a.start_min) FILTER (WHERE a.status IN ('PENDING', 'CONFIRMED', 'FINISHED')), 0),
+            COALESCE(SUM(COALESCE(s.price, 0)) FILTER (WHERE a.status = 'FINISHED' AND a.is_paid), 0),
+            COALESCE(SUM(COALESCE(s.price, 0)) FILTER (WHERE a.status = 'FINISHED' AND NOT a.is_paid), 0)
+        FROM appointment a
+        JOIN service s ON s.id = a.service_id
+        GROUP BY a.date, a.service_id, COALESCE(a.staff_id, 0)
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('appointment_daily_rollup')
@@ -0,0 +1,61 @@
+"""store_times_as_minutes
+
+Revision ID: 3b9e4c1a7d25
+Revises: 2380ba801256
+Create Date: 2026-10-18 09:12:40.512337
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3b9e4c1a7d25'
+down_revision: Union[str, Sequence[str], None] = '2380ba801256'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES = ['appointment', 'block', 'availability_range']
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # "HH:MM" strings -> SMALLINT minute of day
+    for table in TABLES:
+        op.add_column(table, sa.Column('start_min', sa.SmallInteger(), nullable=True))
+        op.add_column(table, sa.Column('end_min', sa.SmallInteger(), nullable=True))
+        op.execute(
+            f"UPDATE {table} SET "
+            f"start_min = split_part(start_time, ':', 1)::int * 60 + split_part(start_time, ':', 2)::int, "
+            f"end_min = split_part(end_time, ':', 1)::int * 60 + split_part(end_time, ':', 2)::int"
+        )
+        op.alter_column(table, 'start_min', nullable=False)
+        op.alter_column(table, 'end_min', nullable=False)
+        op.drop_column(table, 'start_time')
+        op.drop_column(table, 'end_time')
+
+    op.create_index('ix_appointment_date_staff_start', 'appointment', ['date', 'staff_id', 'start_min'], unique=False)
+    op.create_index('ix_block_dates', 'block', ['start_date', 'end_date'], unique=False)
+    op.create_index(op.f('ix_availability_range_availability_day_id'), 'availability_range', ['availability_day_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_availability_range_availability_day_id'), table_name='availability_range')
+    op.drop_index('ix_block_dates', table_name='block')
+    op.drop_index('ix_appointment_date_staff_start', table_name='appointment')
+
+    for table in TABLES:
+        op.add_column(table, sa.Column('start_time', sa.String(), nullable=True))
+        op.add_column(table, sa.Column('end_time', sa.String(), nullable=True))
+        op.execute(
+            f"UPDATE {table} SET "
+            f"start_time = lpad((start_min / 60)::text, 2, '0') || ':' || lpad((start_min % 60)::text, 2, '0'), "
+            f"end_time = lpad((end_min / 60)::text, 2, '0') || ':' || lpad((end_min % 60)::text, 2, '0')"
+        )
+        op.alter_column(table, 'start_time', nullable=False)
+        op.alter_column(table, 'end_time', nullable=False)
+        op.drop_column(table, 'start_min')
+        op.drop_column(table, 'end_min')
@@ -0,0 +1,33 @@
+"""add_client_search_indexes
+
+Revision ID: 3e9a6c1f7b42
+Revises: 1c7e4a2b9d35
+Create Date: 2026-10-18 18:05:47.552093
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3e9a6c1f7b42'
+down_revision: Union[str, Sequence[str], None] = '1c7e4a2b9d35'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.create_index('ix_client_name_trgm', 'client', ['name'], unique=False, postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'})
+    op.create_index('ix_client_phone_trgm', 'client', ['phone_normalized'], unique=False, postgresql_using='gin', postgresql_ops={'phone_normalized': 'gin_trgm_ops'})
+    op.create_index('ix_client_name_order', 'client', [sa.text('lower(name)'), 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_client_name_order', table_name='client')
+    op.drop_index('ix_client_phone_trgm', table_name='client')
+    op.drop_index('ix_client_name_trgm', table_name='client')
@@ -0,0 +1,72 @@
+"""appointment_no_overlap_constraint
+
+Existing double bookings would make the constraint fail, so they are resolved first:
+within each (staff, date) agenda the earliest booked appointment (lowest id) is kept
+and any later active appointment overlapping a kept one is marked CANCELLED.
+The cancelled ids are logged as warnings so they can be reviewed with the clients.
+
+Revision ID: 5d2f8a6c9e13
+Revises: 3b9e4c1a7d25
+Create Date: 2026-10-18 11:40:03.218764
+
+"""
+from typing import Sequence, Union
+
+from collections import defaultdict
+import logging
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d2f8a6c9e13'
+down_revision: Union[str, Sequence[str], None] = '3b9e4c1a7d25'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+ACTIVE = "('PENDING', 'CONFIRMED', 'FINISHED')"
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Existing double bookings would make the constraint fail: keep the first booked one
+    bind = op.get_bind()
+    rows = bind.execute(sa.text(
+        "SELECT id, coalesce(staff_id, 0), date, start_min, end_min FROM appointment "
+        f"WHERE status IN {ACTIVE} ORDER BY id"
+    )).fetchall()
+    kept = defaultdict(list)  # (staff_id, date) -> [(start_min, end_min)]
+    duplicates = []
+    for appt_id, staff_id, day, start, end in rows:
+        agenda = kept[(staff_id, day)]
+        if any(start < k_end and end > k_start for k_start, k_end in agenda):
+            duplicates.append(appt_id)
+        else:
+            agenda.append((start, end))
+    if duplicates:
+        logging.getLogger("alembic").warning(
+            f"Cancelled {len(duplicates)} overlapping active appointments: {', '.join(map(str, duplicates))}"
+        )
+        bind.execute(
+            sa.text("UPDATE appointment SET status = 'CANCELLED' WHERE id IN :ids").bindparams(
+                sa.bindparam("ids", expanding=True)
+            ),
+            {"ids": duplicates}
+        )
+
+    # btree_gist lets plain equality columns share a GiST index with the range
+    op.execute("CREATE EXTENSION IF NOT EXISTS btree_gist")
+    op.execute(
+        "ALTER TABLE appointment ADD CONSTRAINT ex_appointment_no_overlap "
+        "EXCLUDE USING gist ("
+        "(coalesce(staff_id, 0)) WITH =, "
+        "date WITH =, "
+        "int4range(start_min, end_min) WITH &&"
+        f") WHERE (status IN {ACTIVE})"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("ALTER TABLE appointment DROP CONSTRAINT IF EXISTS ex_appointment_no_overlap")
@@ -0,0 +1,57 @@
+"""add_client_stats
+
+Revision ID: 5f1b8d3a6e27
+Revises: 3e9a6c1f7b42
+Create Date: 2026-10-18 18:41:09.367214
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5f1b8d3a6e27'
+down_revision: Union[str, Sequence[str], None] = '3e9a6c1f7b42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('client_stats',
+    sa.Column('client_id', sa.Integer(), nullable=False),
+    sa.Column('appointments', sa.Integer(), nullable=False),
+    sa.Column('visits', sa.Integer(), nullable=False),
+    sa.Column('no_shows', sa.Integer(), nullable=False),
+    sa.Column('cancellations', sa.Integer(), nullable=False),
+    sa.Column('total_paid', sa.Float(), nullable=False),
+    sa.Column('last_visit', sa.Date(), nullable=True),
+    sa.ForeignKeyConstraint(['client_id'], ['client.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('client_id')
+    )
+    op.create_index('ix_appointment_client_date', 'appointment', ['client_id', 'date'], unique=False)
+
+    # Backfill (same aggregation as app.services.client_stats.rebuild_client_stats)
+    op.execute("""
+        INSERT INTO client_stats
+            (client_id, appointments, visits, no_shows, cancellations, total_paid, last_visit)
+        SELECT a.client_id,
+            COUNT(*),
+            COUNT(*) FILTER (WHERE a.status = 'FINISHED'),
+            COUNT(*) FILTER (WHERE a.status = 'NO_SHOW'),
+            COUNT(*) FILTER (WHERE a.status = 'CANCELLED'),
+            COALESCE(SUM(COALESCE(s.price, 0)) FILTER (WHERE a.status = 'FINISHED' AND a.is_paid), 0),
+            MAX(a.date) FILTER (WHERE a.status = 'FINISHED')
+        FROM appointment a
+        JOIN service s ON s.id = a.service_id
+        WHERE a.client_id IS NOT NULL
+        GROUP BY a.client_id
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_appointment_client_date', table_name='appointment')
+    op.drop_table('client_stats')
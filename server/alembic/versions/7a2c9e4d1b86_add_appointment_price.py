@@ -0,0 +1,37 @@
+"""add_appointment_price
+
+Revision ID: 7a2c9e4d1b86
+Revises: 5f1b8d3a6e27
+Create Date: 2026-10-18 21:12:47.530918
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7a2c9e4d1b86'
+down_revision: Union[str, Sequence[str], None] = '5f1b8d3a6e27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('appointment', sa.Column('price', sa.Float(), nullable=True))
+
+    # Existing appointments take the current catalog price, the same value the
+    # rollup and client stats were backfilled with
+    op.execute("""
+        UPDATE appointment a
+        SET price = s.price
+        FROM service s
+        WHERE s.id = a.service_id
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('appointment', 'price')
@@ -0,0 +1,49 @@
+"""add_normalized_phone_columns
+
+Revision ID: c4e7a1d93b26
+Revises: 8a41c7e2b5f0
+Create Date: 2026-10-18 14:22:41.318905
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.core.phone import normalize_phone
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4e7a1d93b26'
+down_revision: Union[str, Sequence[str], None] = '8a41c7e2b5f0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _backfill(table: str, source: str, target: str) -> None:
+    # Same normalization the models apply on write
+    conn = op.get_bind()
+    rows = conn.execute(sa.text(f"SELECT id, {source} FROM {table}")).fetchall()
+    params = [{"id": row[0], "value": normalize_phone(row[1])} for row in rows]
+    if params:
+        conn.execute(sa.text(f"UPDATE {table} SET {target} = :value WHERE id = :id"), params)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('appointment', sa.Column('client_phone_normalized', sa.String(), nullable=True))
+    op.add_column('client', sa.Column('phone_normalized', sa.String(), nullable=True))
+
+    _backfill('appointment', 'client_phone', 'client_phone_normalized')
+    _backfill('client', 'phone', 'phone_normalized')
+
+    op.create_index('ix_appointment_phone_reminder', 'appointment', ['client_phone_normalized', 'confirmation_sent_at'], unique=False)
+    op.create_index(op.f('ix_client_phone_normalized'), 'client', ['phone_normalized'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_client_phone_normalized'), table_name='client')
+    op.drop_index('ix_appointment_phone_reminder', table_name='appointment')
+    op.drop_column('client', 'phone_normalized')
+    op.drop_column('appointment', 'client_phone_normalized')
@@ -0,0 +1,42 @@
+"""add_inbound_message_inbox
+
+Revision ID: e2b8d5f17a40
+Revises: c4e7a1d93b26
+Create Date: 2026-10-18 15:02:13.774520
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2b8d5f17a40'
+down_revision: Union[str, Sequence[str], None] = 'c4e7a1d93b26'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('inbound_message',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('sender', sa.String(), nullable=False),
+    sa.Column('body', sa.String(), nullable=False),
+    sa.Column('status', sa.Enum('PENDING', 'PROCESSED', 'FAILED', name='inboundstatus'), nullable=False),
+    sa.Column('last_error', sa.String(), nullable=True),
+    sa.Column('received_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('processed_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_inbound_message_id'), 'inbound_message', ['id'], unique=False)
+    op.create_index('ix_inbound_message_status', 'inbound_message', ['status', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_inbound_message_status', table_name='inbound_message')
+    op.drop_index(op.f('ix_inbound_message_id'), table_name='inbound_message')
+    op.drop_table('inbound_message')
+    sa.Enum(name='inboundstatus').drop(op.get_bind(), checkfirst=True)
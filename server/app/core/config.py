@@ -17,6 +17,17 @@ class Settings(BaseSettings):
     
     TIMEZONE: str = "America/Argentina/Cordoba"
 
+    # Database connection pool (per engine: the sync and the async engine each get one)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: int = 30
+    DB_POOL_RECYCLE: int = 1800  # Seconds; drop connections before the server or proxy does
+    DB_POOL_PRE_PING: bool = True
+    DB_STATEMENT_TIMEOUT_MS: int = 15000  # 0 disables
+
+    # In-process slot cache (entries keyed by date, service and staff)
+    SLOT_CACHE_SIZE: int = 512
+
     # WhatsApp (Bridge Local)
     WHATSAPP_BRIDGE_URL: str = "http://localhost:3001"
     ADMIN_PHONE: str = ""
@@ -25,6 +36,29 @@ class Settings(BaseSettings):
     TELEGRAM_BOT_TOKEN: str = ""
     TELEGRAM_CHAT_ID: str = ""
 
+    # Outbound HTTP (WhatsApp bridge, Telegram): shared keep-alive clients
+    HTTP_CONNECT_TIMEOUT: float = 5.0
+    HTTP_READ_TIMEOUT: float = 10.0
+    HTTP_MAX_CONNECTIONS: int = 20
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 10
+    HTTP_KEEPALIVE_EXPIRY: float = 30.0
+
+    # Confirmation reminders sent in parallel per run (keep <= HTTP_MAX_CONNECTIONS)
+    REMINDER_CONCURRENCY: int = 8
+
+    # Notification outbox dispatcher
+    NOTIFICATION_POLL_SECONDS: int = 5
+    NOTIFICATION_BATCH_SIZE: int = 20
+    NOTIFICATION_MAX_ATTEMPTS: int = 6
+    NOTIFICATION_RETRY_BASE_SECONDS: int = 30
+
+    # Idempotency-Key responses for POST /api/appointments are replayed for this long
+    IDEMPOTENCY_TTL_HOURS: int = 24
+
+    # Inbound WhatsApp inbox worker
+    INBOX_POLL_SECONDS: int = 2
+    INBOX_BATCH_SIZE: int = 50
+
     class Config:
         case_sensitive = True
         env_file = ".env"
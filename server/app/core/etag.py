@@ -0,0 +1,52 @@
+import hashlib
+import threading
+import time
+from collections import defaultdict
+from typing import Optional
+from fastapi import Request, Response
+
+# Versions live in process memory, so every process start gets its own
+# token: a tag issued before a restart can never match a fresh counter.
+_BOOT = format(time.time_ns(), "x")
+
+_lock = threading.Lock()
+_versions = defaultdict(int)
+
+def bump(*resources: str):
+    """Record a committed change to the given resources (services, availability, blocks, appointments)."""
+    with _lock:
+        for resource in resources:
+            _versions[resource] += 1
+
+def current(resource: str) -> int:
+    return _versions[resource]
+
+def make_etag(*resources: str, extra: str = "") -> str:
+    versions = ",".join(f"{r}:{_versions[r]}" for r in resources)
+    digest = hashlib.sha1(f"{versions}|{extra}".encode()).hexdigest()[:16]
+    return f'W/"{_BOOT}-{digest}"'
+
+def _matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    # Weak comparison: the W/ prefix is ignored on both sides
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+def check_etag(request: Request, response: Response, *resources: str, extra: str = "") -> Optional[Response]:
+    """
+    Compute the ETag of a read and return a 304 response when the client already has it.
+    Must run before the data is read so a concurrent write can only make the tag older, never newer.
+    """
+    etag = make_etag(*resources, extra=extra)
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _matches(if_none_match, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    return None
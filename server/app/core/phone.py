@@ -0,0 +1,24 @@
+import re
+from typing import Optional
+
+_NON_DIGITS = re.compile(r"\D")
+
+def normalize_phone(phone: Optional[str]) -> Optional[str]:
+    """
+    Normalize an Argentine phone number to E.164 mobile form ("+549...").
+    Accepts "+54 9 351...", "54351...", "0351..." or a bare local number,
+    and WhatsApp ids such as "5493512345678@c.us".
+    """
+    if not phone:
+        return None
+    digits = _NON_DIGITS.sub("", phone.split("@")[0])
+    if not digits:
+        return None
+    if digits.startswith("549"):
+        pass
+    elif digits.startswith("54"):
+        digits = "549" + digits[2:]
+    else:
+        # Drop the national trunk prefix
+        digits = "549" + digits.lstrip("0")
+    return "+" + digits
@@ -17,3 +17,19 @@ def to_local(dt: datetime):
 def get_today():
     """Get today's date in local timezone."""
     return get_current_time().date()
+
+def parse_time(t_str: str) -> time:
+    h, m = map(int, t_str.split(':'))
+    return time(h, m)
+
+def time_to_min(t: time) -> int:
+    return t.hour * 60 + t.minute
+
+def min_to_time(m: int) -> str:
+    h = m // 60
+    mm = m % 60
+    return f"{h:02d}:{mm:02d}"
+
+def hhmm_to_min(t_str: str) -> int:
+    """Convert an "HH:MM" string to minutes since midnight."""
+    return time_to_min(parse_time(t_str))
@@ -0,0 +1,81 @@
+import threading
+import time
+from collections import deque
+from sqlalchemy import exc
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
+
+class PoolStats:
+    """Checkout counters and wait times of one connection pool (process-local)."""
+
+    # Wait-time percentiles are computed over the most recent checkouts
+    RECENT = 1000
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self._recent = deque(maxlen=self.RECENT)
+
+    def record(self, wait: float):
+        with self._lock:
+            self.checkouts += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+            self._recent.append(wait)
+
+    def record_timeout(self):
+        with self._lock:
+            self.timeouts += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            recent = sorted(self._recent)
+            checkouts, timeouts = self.checkouts, self.timeouts
+            total_wait, max_wait = self.total_wait, self.max_wait
+
+        def pct(p):
+            return round(recent[min(len(recent) - 1, int(len(recent) * p))] * 1000, 2) if recent else 0.0
+
+        return {
+            "checkouts": checkouts,
+            "timeouts": timeouts,
+            "wait_avg_ms": round(total_wait / checkouts * 1000, 2) if checkouts else 0.0,
+            "wait_p95_ms": pct(0.95),
+            "wait_max_ms": round(max_wait * 1000, 2),
+        }
+
+class _TimedCheckout:
+    # One PoolStats per pool class, so it survives engine.dispose() recreating the pool
+    stats: PoolStats
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            conn = super().connect()
+        except exc.TimeoutError:
+            self.stats.record_timeout()
+            raise
+        self.stats.record(time.perf_counter() - start)
+        return conn
+
+class TimedQueuePool(_TimedCheckout, QueuePool):
+    stats = PoolStats()
+
+class TimedAsyncQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    stats = PoolStats()
+
+def pool_status(pool) -> dict:
+    """Live state of a QueuePool plus the checkout stats recorded by the Timed* pools."""
+    status = {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "idle": pool.checkedin(),
+        # overflow() starts at -size; only positive values are connections beyond the pool size
+        "overflow": max(pool.overflow(), 0),
+        "max_overflow": pool._max_overflow,
+    }
+    if isinstance(pool, _TimedCheckout):
+        status.update(pool.stats.snapshot())
+    return status
@@ -1,3 +1,4 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
@@ -8,23 +9,31 @@ from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
 
-from app.routers import auth, services, availability, blocks, slots, appointments, clients, webhooks
+from app.routers import auth, services, availability, blocks, slots, appointments, clients, webhooks, admin, analytics
 from app.core import config
 from app.core.config import settings
 import app.models # Register all models
 
+# Scheduler and shared outbound HTTP clients
+from app.services.automated_tasks import start_scheduler, stop_scheduler
+from app.services.http_clients import open_clients, close_clients
+from app.db.session import async_engine
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    open_clients()
+    start_scheduler()
+    yield
+    stop_scheduler()
+    await close_clients()
+    await async_engine.dispose()
+
 # Initialize rate limiter
 limiter = Limiter(key_func=get_remote_address)
-app = FastAPI(title="Roma Cabello API")
+app = FastAPI(title="Roma Cabello API", lifespan=lifespan)
 app.state.limiter = limiter
 app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
 
-# Scheduler
-from app.services.automated_tasks import start_scheduler
-@app.on_event("startup")
-def startup_event():
-    start_scheduler()
-
 # Security Middleware
 app.add_middleware(
     TrustedHostMiddleware, 
@@ -84,3 +93,5 @@ app.include_router(slots.router, prefix="/api/slots", tags=["Slots"])
 app.include_router(appointments.router, prefix="/api/appointments", tags=["Appointments"])
 app.include_router(clients.router, prefix="/api/clients", tags=["Clients"])
 app.include_router(webhooks.router, prefix="/api/webhooks", tags=["Webhooks"])
+app.include_router(admin.router, prefix="/api/admin", tags=["Admin"])
+app.include_router(analytics.router, prefix="/api/analytics", tags=["Analytics"])
@@ -5,3 +5,8 @@ from .availability import AvailabilityDay, AvailabilityRange
 from .block import Block
 from .appointment import Appointment
 from .client import Client
+from .notification import NotificationOutbox
+from .inbound_message import InboundMessage
+from .idempotency import IdempotencyKey
+from .rollup import AppointmentDailyRollup
+from .client_stats import ClientStats
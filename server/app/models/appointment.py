@@ -1,8 +1,10 @@
 import enum
-from sqlalchemy import Column, Integer, Date, String, ForeignKey, Enum, DateTime, UniqueConstraint, Boolean
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, Date, String, ForeignKey, Enum, DateTime, UniqueConstraint, Boolean, Float, Index
+from sqlalchemy.orm import relationship, validates
 from sqlalchemy.sql import func
 from app.db.session import Base
+from app.models.time_range import MinuteRangeMixin
+from app.core.phone import normalize_phone
 
 class AppointmentStatus(str, enum.Enum):
     PENDING = "PENDING"
@@ -11,24 +13,29 @@ class AppointmentStatus(str, enum.Enum):
     NO_SHOW = "NO_SHOW"
     FINISHED = "FINISHED"
 
-class Appointment(Base):
+# Postgres EXCLUDE USING gist constraint (see migration 5d2f8a6c9e13): active
+# appointments of the same staff (NULL = general agenda) and date cannot overlap.
+NO_OVERLAP_CONSTRAINT = "ex_appointment_no_overlap"
+
+class Appointment(MinuteRangeMixin, Base):
     __tablename__ = "appointment"
 
     id = Column(Integer, primary_key=True, index=True)
     date = Column(Date, nullable=False, index=True)
-    start_time = Column(String, nullable=False) # HH:MM
-    end_time = Column(String, nullable=False)   # HH:MM
+    # start_min / end_min (minute of day) come from MinuteRangeMixin
     
     service_id = Column(Integer, ForeignKey("service.id"), nullable=False)
     staff_id = Column(Integer, ForeignKey("staff.id"), nullable=True)
     
     client_name = Column(String, nullable=False)
     client_phone = Column(String, nullable=False)
+    client_phone_normalized = Column(String, nullable=True)  # E.164, kept in sync with client_phone
     client_id = Column(Integer, ForeignKey("client.id"), nullable=True)
     note = Column(String, nullable=True)
     
     status = Column(Enum(AppointmentStatus), default=AppointmentStatus.PENDING, nullable=False)
     is_paid = Column(Boolean, default=False, nullable=False)
+    price = Column(Float, nullable=True)  # Service price when booked, later catalog changes do not apply
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
     # Tracking para confirmaciones
@@ -37,3 +44,18 @@ class Appointment(Base):
     service = relationship("Service")
     staff = relationship("Staff")
     client = relationship("Client", back_populates="appointments")
+
+    __table_args__ = (
+        Index('ix_appointment_date_staff_start', 'date', 'staff_id', 'start_min'),
+        # Client history and last visit
+        Index('ix_appointment_client_date', 'client_id', 'date'),
+        # Admin listing order and keyset
+        Index('ix_appointment_listing', 'date', 'start_min', 'id'),
+        # Inbound WhatsApp replies are matched by sender and most recent reminder
+        Index('ix_appointment_phone_reminder', 'client_phone_normalized', 'confirmation_sent_at'),
+    )
+
+    @validates("client_phone")
+    def _sync_phone_normalized(self, key, value):
+        self.client_phone_normalized = normalize_phone(value)
+        return value
@@ -1,6 +1,7 @@
 from sqlalchemy import Column, Integer, Date, Boolean, String, ForeignKey, UniqueConstraint
 from sqlalchemy.orm import relationship
 from app.db.session import Base
+from app.models.time_range import MinuteRangeMixin
 
 class AvailabilityDay(Base):
     __tablename__ = "availability_day"
@@ -17,12 +18,11 @@ class AvailabilityDay(Base):
         UniqueConstraint('date', 'staff_id', name='uq_avail_date_staff'),
     )
 
-class AvailabilityRange(Base):
+class AvailabilityRange(MinuteRangeMixin, Base):
     __tablename__ = "availability_range"
 
     id = Column(Integer, primary_key=True, index=True)
-    availability_day_id = Column(Integer, ForeignKey("availability_day.id"), nullable=False)
-    start_time = Column(String, nullable=False) # HH:MM
-    end_time = Column(String, nullable=False)   # HH:MM
+    availability_day_id = Column(Integer, ForeignKey("availability_day.id"), nullable=False, index=True)
+    # start_min / end_min (minute of day) come from MinuteRangeMixin
 
     day = relationship("AvailabilityDay", back_populates="ranges")
@@ -1,13 +1,17 @@
-from sqlalchemy import Column, Integer, Date, String, ForeignKey
+from sqlalchemy import Column, Integer, Date, String, ForeignKey, Index
 from app.db.session import Base
+from app.models.time_range import MinuteRangeMixin
 
-class Block(Base):
+class Block(MinuteRangeMixin, Base):
     __tablename__ = "block"
 
     id = Column(Integer, primary_key=True, index=True)
     start_date = Column(Date, nullable=False)
     end_date = Column(Date, nullable=False)
-    start_time = Column(String, nullable=False) # HH:MM
-    end_time = Column(String, nullable=False)   # HH:MM
+    # start_min / end_min (minute of day) come from MinuteRangeMixin
     reason = Column(String, nullable=True)
     staff_id = Column(Integer, ForeignKey("staff.id"), nullable=True)
+
+    __table_args__ = (
+        Index('ix_block_dates', 'start_date', 'end_date'),
+    )
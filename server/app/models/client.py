@@ -1,7 +1,8 @@
-from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy import Column, Integer, String, DateTime, Index
 from sqlalchemy.sql import func
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, validates
 from app.db.session import Base
+from app.core.phone import normalize_phone
 
 class Client(Base):
     __tablename__ = "client"
@@ -9,7 +10,21 @@ class Client(Base):
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, nullable=False)
     phone = Column(String, unique=True, index=True, nullable=False)
+    phone_normalized = Column(String, index=True, nullable=True)  # E.164, kept in sync with phone
     email = Column(String, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     appointments = relationship("Appointment", back_populates="client")
+
+    __table_args__ = (
+        # Search (see app.services.client_search): pg_trgm for substring matches,
+        # (lower(name), id) for the result order and keyset pagination
+        Index('ix_client_name_trgm', 'name', postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'}),
+        Index('ix_client_phone_trgm', 'phone_normalized', postgresql_using='gin', postgresql_ops={'phone_normalized': 'gin_trgm_ops'}),
+        Index('ix_client_name_order', func.lower(name), 'id'),
+    )
+
+    @validates("phone")
+    def _sync_phone_normalized(self, key, value):
+        self.phone_normalized = normalize_phone(value)
+        return value
@@ -0,0 +1,17 @@
+from sqlalchemy import Column, Integer, Date, Float, ForeignKey
+from app.db.session import Base
+
+class ClientStats(Base):
+    """
+    Visit counters of one client, maintained with the appointment rollup
+    (see app.services.client_stats).
+    """
+    __tablename__ = "client_stats"
+
+    client_id = Column(Integer, ForeignKey("client.id", ondelete="CASCADE"), primary_key=True)
+    appointments = Column(Integer, default=0, nullable=False)  # Every booking, any status
+    visits = Column(Integer, default=0, nullable=False)        # FINISHED
+    no_shows = Column(Integer, default=0, nullable=False)
+    cancellations = Column(Integer, default=0, nullable=False)
+    total_paid = Column(Float, default=0, nullable=False)      # Service price of paid visits
+    last_visit = Column(Date, nullable=True)
@@ -0,0 +1,25 @@
+import enum
+from sqlalchemy import Column, Integer, String, Enum, DateTime, Index
+from sqlalchemy.sql import func
+from app.db.session import Base
+
+class InboundStatus(str, enum.Enum):
+    PENDING = "PENDING"
+    PROCESSED = "PROCESSED"
+    FAILED = "FAILED"
+
+class InboundMessage(Base):
+    __tablename__ = "inbound_message"
+
+    id = Column(Integer, primary_key=True, index=True)
+    sender = Column(String, nullable=False)  # E.164 phone of the sender
+    body = Column(String, nullable=False)
+
+    status = Column(Enum(InboundStatus), default=InboundStatus.PENDING, nullable=False)
+    last_error = Column(String, nullable=True)
+    received_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    processed_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        Index('ix_inbound_message_status', 'status', 'id'),
+    )
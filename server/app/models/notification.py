@@ -0,0 +1,32 @@
+import enum
+from sqlalchemy import Column, Integer, String, Enum, DateTime, Index
+from sqlalchemy.sql import func
+from app.db.session import Base
+
+class NotificationChannel(str, enum.Enum):
+    WHATSAPP = "WHATSAPP"
+    TELEGRAM = "TELEGRAM"
+
+class NotificationStatus(str, enum.Enum):
+    PENDING = "PENDING"
+    SENT = "SENT"
+    FAILED = "FAILED"
+
+class NotificationOutbox(Base):
+    __tablename__ = "notification_outbox"
+
+    id = Column(Integer, primary_key=True, index=True)
+    channel = Column(Enum(NotificationChannel), nullable=False)
+    recipient = Column(String, nullable=True)  # Phone for WhatsApp; Telegram uses the configured chat
+    body = Column(String, nullable=False)
+
+    status = Column(Enum(NotificationStatus), default=NotificationStatus.PENDING, nullable=False)
+    attempts = Column(Integer, default=0, nullable=False)
+    next_attempt_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    last_error = Column(String, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    sent_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        Index('ix_notification_outbox_due', 'status', 'next_attempt_at'),
+    )
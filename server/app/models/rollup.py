@@ -0,0 +1,31 @@
+from sqlalchemy import Column, Integer, Date, Float, ForeignKey, UniqueConstraint
+from app.db.session import Base
+
+class AppointmentDailyRollup(Base):
+    """
+    Per (date, service, staff) counters maintained incrementally by appointment_service
+    (see app.services.rollup); rebuild with `python -m app.services.rollup`.
+    """
+    __tablename__ = "appointment_daily_rollup"
+
+    id = Column(Integer, primary_key=True)
+    date = Column(Date, nullable=False)
+    service_id = Column(Integer, ForeignKey("service.id"), nullable=False)
+    staff_id = Column(Integer, nullable=False, default=0)  # 0 = general agenda (no staff)
+
+    # Appointments per status
+    pending = Column(Integer, default=0, nullable=False)
+    confirmed = Column(Integer, default=0, nullable=False)
+    cancelled = Column(Integer, default=0, nullable=False)
+    no_show = Column(Integer, default=0, nullable=False)
+    finished = Column(Integer, default=0, nullable=False)
+
+    # Minutes taken by active (pending, confirmed, finished) appointments
+    booked_min = Column(Integer, default=0, nullable=False)
+    # Service price of finished appointments, split by is_paid
+    revenue_paid = Column(Float, default=0, nullable=False)
+    revenue_unpaid = Column(Float, default=0, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint('date', 'service_id', 'staff_id', name='uq_appointment_daily_rollup_key'),
+    )
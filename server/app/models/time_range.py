@@ -0,0 +1,26 @@
+from sqlalchemy import Column, SmallInteger
+from app.core.time import min_to_time, hhmm_to_min
+
+class MinuteRangeMixin:
+    """
+    Start/end stored as minute-of-day integers so overlaps can be filtered
+    and indexed in SQL. start_time/end_time keep the "HH:MM" API shape.
+    """
+    start_min = Column(SmallInteger, nullable=False)
+    end_min = Column(SmallInteger, nullable=False)
+
+    @property
+    def start_time(self) -> str:
+        return None if self.start_min is None else min_to_time(self.start_min)
+
+    @start_time.setter
+    def start_time(self, value: str):
+        self.start_min = hhmm_to_min(value)
+
+    @property
+    def end_time(self) -> str:
+        return None if self.end_min is None else min_to_time(self.end_min)
+
+    @end_time.setter
+    def end_time(self, value: str):
+        self.end_min = hhmm_to_min(value)
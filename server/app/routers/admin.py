@@ -0,0 +1,17 @@
+from fastapi import APIRouter, Depends
+from app.core.deps import get_current_admin
+from app.db.session import engine, async_engine
+from app.db.pool import pool_status
+
+router = APIRouter(dependencies=[Depends(get_current_admin)])
+
+@router.get("/db-pool")
+def get_db_pool_status():
+    """
+    Admin only: live state of the database connection pools
+    (checked-out / idle connections, overflow, checkout wait times since start).
+    """
+    return {
+        "sync": pool_status(engine.pool),
+        "async": pool_status(async_engine.pool),
+    }
@@ -0,0 +1,34 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from datetime import date
+from app.core.deps import get_db, get_current_admin
+from app.schemas.analytics import RollupPeriod, RollupGroup, RollupRow
+from app.services.rollup import summarize
+
+router = APIRouter(dependencies=[Depends(get_current_admin)])
+
+MAX_RANGE_DAYS = 3 * 366
+
+@router.get("/rollup", response_model=List[RollupRow])
+def get_rollup(
+    start_date: date = Query(..., alias="from"),
+    end_date: date = Query(..., alias="to"),
+    period: RollupPeriod = RollupPeriod.DAY,
+    group_by: Optional[RollupGroup] = None,
+    service_id: Optional[int] = None,
+    staff_id: Optional[int] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    Admin only: appointments per status, booked minutes and revenue (finished appointments,
+    paid / unpaid) per day or month, optionally split by service or staff.
+    """
+    if end_date < start_date:
+        raise HTTPException(status_code=400, detail="'to' must be on or after 'from'")
+    if (end_date - start_date).days >= MAX_RANGE_DAYS:
+        raise HTTPException(status_code=400, detail=f"Range cannot exceed {MAX_RANGE_DAYS} days")
+    return summarize(
+        db, start_date, end_date, period.value,
+        group_by.value if group_by else None, service_id, staff_id
+    )
@@ -1,43 +1,158 @@
-from fastapi import APIRouter, Depends, Query, Request
-from sqlalchemy.orm import Session, joinedload
+import csv
+import io
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response, UploadFile, File
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import ValidationError
+from sqlalchemy.orm import Session
 from typing import List, Optional
 from datetime import date
 from app.core.deps import get_db, get_current_admin
-from app.schemas.appointment import AppointmentCreate, AppointmentOut, AppointmentReschedule, AppointmentUpdate
-from app.models.appointment import Appointment
+from app.schemas.appointment import (
+    AppointmentCreate, AppointmentOut, AppointmentReschedule, AppointmentUpdate,
+    AppointmentImportRow, AppointmentImportResult, AppointmentStatus
+)
 from app.services.appointment_service import create_appointment as service_create_appointment
 from app.services.appointment_service import cancel_appointment as service_cancel_appointment
 from app.services.appointment_service import reschedule_appointment as service_reschedule_appointment
 from app.services.appointment_service import confirm_appointment as service_confirm_appointment
+from app.services.appointment_service import import_appointments as service_import_appointments
+from app.core.pagination import NEXT_CURSOR_HEADER
+from app.services.appointment_listing import list_appointments, list_appointments_projected, parse_fields
+from app.services.exports import ExportFormat, MEDIA_TYPES, export_appointments, export_headers
+from app.services.idempotency import request_hash, claim_key, store_response, release_key, has_stored_response
 from slowapi import Limiter
 from slowapi.util import get_remote_address
 
 router = APIRouter()
 limiter = Limiter(key_func=get_remote_address)
 
+MAX_PAGE_SIZE = 500
+
+def _is_replay(request: Request) -> bool:
+    # A retry of a finished request only gets its stored response back, so it is not rate limited
+    return has_stored_response(request.headers.get("Idempotency-Key"))
+
 @router.post("/", response_model=AppointmentOut)
-@limiter.limit("3/minute")
-def create_appointment(request: Request, appt_in: AppointmentCreate, db: Session = Depends(get_db)):
-    return service_create_appointment(db, appt_in)
+@limiter.limit("3/minute", exempt_when=_is_replay)
+def create_appointment(
+    request: Request,
+    appt_in: AppointmentCreate,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+    db: Session = Depends(get_db)
+):
+    if not idempotency_key:
+        return service_create_appointment(db, appt_in)
+
+    # Retries with the same key get the first response back without booking again
+    replay = claim_key(db, idempotency_key, request_hash(appt_in.model_dump_json()))
+    if replay:
+        return replay
+    try:
+        appt = service_create_appointment(db, appt_in)
+    except HTTPException as e:
+        # Validation outcomes are part of the response and replayed as well
+        db.rollback()
+        store_response(db, idempotency_key, e.status_code, {"detail": e.detail})
+        raise
+    except Exception:
+        release_key(db, idempotency_key)
+        raise
+    body = AppointmentOut.model_validate(appt).model_dump(mode="json")
+    store_response(db, idempotency_key, 200, body)
+    return body
+
+@router.post("/import", response_model=AppointmentImportResult, dependencies=[Depends(get_current_admin)])
+def import_appointments(
+    rows: List[AppointmentImportRow],
+    notify: bool = Query(False),
+    db: Session = Depends(get_db)
+):
+    """
+    Admin only: bulk import a JSON list of appointments in one transaction.
+    """
+    return service_import_appointments(db, rows, notify)
+
+@router.post("/import/csv", response_model=AppointmentImportResult, dependencies=[Depends(get_current_admin)])
+def import_appointments_csv(
+    file: UploadFile = File(...),
+    notify: bool = Query(False),
+    db: Session = Depends(get_db)
+):
+    """
+    Admin only: bulk import from a CSV with a header row
+    (date, start_time, service_id, staff_id, client_name, client_phone, note, is_paid, status).
+    """
+    try:
+        text = io.TextIOWrapper(file.file, encoding="utf-8-sig")
+        records = list(csv.DictReader(text))
+    except (UnicodeDecodeError, csv.Error):
+        raise HTTPException(status_code=400, detail="Invalid CSV file")
+
+    rows, errors = [], []
+    for i, record in enumerate(records):
+        # Empty cells fall back to the field defaults
+        values = {k.strip(): v.strip() for k, v in record.items() if k and v and v.strip()}
+        try:
+            rows.append(AppointmentImportRow.model_validate(values))
+        except ValidationError as e:
+            errors.append({"row": i, "detail": "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors())})
+    if errors:
+        raise HTTPException(status_code=400, detail={"message": "Import rejected, nothing was saved", "errors": errors})
+
+    return service_import_appointments(db, rows, notify)
 
 @router.get("/", response_model=List[AppointmentOut], dependencies=[Depends(get_current_admin)])
 def get_appointments(
+    response: Response,
     from_date: Optional[date] = Query(None, alias="from"),
     to_date: Optional[date] = Query(None, alias="to"),
     date_eq: Optional[date] = Query(None, alias="date"),
+    status: Optional[List[AppointmentStatus]] = Query(None),
+    staff_id: Optional[int] = None,
+    service_id: Optional[int] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    after: Optional[str] = None,
+    fields: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
-    query = db.query(Appointment).options(joinedload(Appointment.service), joinedload(Appointment.staff))
-    
-    if date_eq:
-        query = query.filter(Appointment.date == date_eq)
-    else:
-        if from_date:
-            query = query.filter(Appointment.date >= from_date)
-        if to_date:
-            query = query.filter(Appointment.date <= to_date)
-            
-    return query.order_by(Appointment.date, Appointment.start_time).all()
+    """
+    Admin agenda in (date, start time) order.
+    With limit, one page is returned and X-Next-Cursor carries the value to pass as after=
+    for the next one (absent on the last page). fields=id,date,start_time,... returns only
+    those keys (plus "service" for the nested service).
+    """
+    filters = dict(
+        from_date=from_date, to_date=to_date, date_eq=date_eq,
+        status=status, staff_id=staff_id, service_id=service_id
+    )
+    projection = parse_fields(fields)
+    if projection:
+        items, next_cursor = list_appointments_projected(db, projection, limit, after, **filters)
+        headers = {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else None
+        return JSONResponse(content=jsonable_encoder(items), headers=headers)
+
+    appointments, next_cursor = list_appointments(db, limit, after, **filters)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return appointments
+
+@router.get("/export", dependencies=[Depends(get_current_admin)])
+def export_appointments_file(
+    format: ExportFormat = Query(ExportFormat.CSV),
+    from_date: Optional[date] = Query(None, alias="from"),
+    to_date: Optional[date] = Query(None, alias="to"),
+    status: Optional[List[AppointmentStatus]] = Query(None),
+    staff_id: Optional[int] = None,
+    service_id: Optional[int] = None
+):
+    """
+    Admin only: stream appointments (with service name, price and is_paid) as CSV or NDJSON.
+    """
+    rows = export_appointments(
+        format, from_date=from_date, to_date=to_date, status=status, staff_id=staff_id, service_id=service_id
+    )
+    return StreamingResponse(rows, media_type=MEDIA_TYPES[format], headers=export_headers("appointments", format))
 
 @router.put("/{id}/cancel", response_model=AppointmentOut, dependencies=[Depends(get_current_admin)])
 def cancel_appointment(id: int, db: Session = Depends(get_db)):
@@ -1,30 +1,41 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import select
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from datetime import date
 from app.schemas.availability import AvailabilityOut, AvailabilityCreate, AvailabilityUpdate
 from app.models.availability import AvailabilityDay, AvailabilityRange
-from app.core.deps import get_db, get_current_admin
+from app.core.deps import get_db, get_async_db, get_current_admin
+from app.core import etag
+from app.services.slot_cache import slot_cache
 
 router = APIRouter()
 
 @router.get("/", response_model=List[AvailabilityOut])
-def get_availability(
+async def get_availability(
+    request: Request,
+    response: Response,
     start_date: date = Query(..., alias="from"),
     end_date: date = Query(..., alias="to"),
     staff_id: Optional[int] = None,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    query = db.query(AvailabilityDay).filter(
+    not_modified = etag.check_etag(request, response, "availability", extra=f"{start_date}|{end_date}|{staff_id}")
+    if not_modified:
+        return not_modified
+
+    # Ranges are loaded up front: lazy loads are not available on an AsyncSession
+    query = select(AvailabilityDay).options(selectinload(AvailabilityDay.ranges)).where(
         AvailabilityDay.date >= start_date,
         AvailabilityDay.date <= end_date
     )
     if staff_id:
-        query = query.filter(AvailabilityDay.staff_id == staff_id)
+        query = query.where(AvailabilityDay.staff_id == staff_id)
     else:
-        query = query.filter(AvailabilityDay.staff_id.is_(None))
+        query = query.where(AvailabilityDay.staff_id.is_(None))
         
-    return query.all()
+    return (await db.execute(query)).scalars().all()
 
 @router.put("/{date_str}", response_model=AvailabilityOut, dependencies=[Depends(get_current_admin)])
 def update_availability(
@@ -64,4 +75,6 @@ def update_availability(
             
     db.commit()
     db.refresh(existing)
+    slot_cache.invalidate_dates([date_str])
+    etag.bump("availability")
     return existing
@@ -1,14 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from sqlalchemy.orm import Session
 from typing import List
 from app.schemas.block import BlockCreate, BlockOut
 from app.models.block import Block
 from app.core.deps import get_db, get_current_admin
+from app.core import etag
+from app.services.slot_cache import slot_cache
 
 router = APIRouter()
 
 @router.get("/", response_model=List[BlockOut])
-def get_blocks(db: Session = Depends(get_db)):
+def get_blocks(request: Request, response: Response, db: Session = Depends(get_db)):
+    not_modified = etag.check_etag(request, response, "blocks")
+    if not_modified:
+        return not_modified
     return db.query(Block).all()
 
 @router.post("/", response_model=BlockOut, dependencies=[Depends(get_current_admin)])
@@ -17,6 +22,8 @@ def create_block(block_in: BlockCreate, db: Session = Depends(get_db)):
     db.add(block)
     db.commit()
     db.refresh(block)
+    slot_cache.invalidate_date_range(block.start_date, block.end_date)
+    etag.bump("blocks")
     return block
 
 @router.delete("/{id}", dependencies=[Depends(get_current_admin)])
@@ -25,6 +32,9 @@ def delete_block(id: int, db: Session = Depends(get_db)):
     if not block:
         raise HTTPException(status_code=404, detail="Block not found")
     
+    start_date, end_date = block.start_date, block.end_date
     db.delete(block)
     db.commit()
+    slot_cache.invalidate_date_range(start_date, end_date)
+    etag.bump("blocks")
     return {"ok": True}
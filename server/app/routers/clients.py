@@ -1,26 +1,81 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from typing import List
-from app.core.deps import get_db, get_current_admin
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from app.core.deps import get_db, get_async_db, get_current_admin
 from app.models.client import Client
-from app.schemas.client import Client as ClientSchema
+from app.models.appointment import Appointment
+from app.schemas.client import Client as ClientSchema, ClientProfile, ClientStats
+from app.core.pagination import NEXT_CURSOR_HEADER
+from app.services.client_search import search_clients
+from app.services.client_stats import get_client_stats
+from app.services.exports import ExportFormat, MEDIA_TYPES, export_clients, export_headers
 
 router = APIRouter()
 
 @router.get("/lookup", response_model=ClientSchema)
-def lookup_client_by_phone(phone: str, db: Session = Depends(get_db)):
+async def lookup_client_by_phone(phone: str, db: AsyncSession = Depends(get_async_db)):
     """
     Public endpoint to check if a client exists by phone number.
     Used for pre-filling booking forms.
     """
-    client = db.query(Client).filter(Client.phone == phone).first()
+    client = (await db.execute(select(Client).where(Client.phone == phone))).scalars().first()
     if not client:
         raise HTTPException(status_code=404, detail="Client not found")
     return client
 
+@router.get("/search", response_model=List[ClientSchema], dependencies=[Depends(get_current_admin)])
+def search_clients_endpoint(
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(20, ge=1, le=100),
+    after: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    Admin only: clients by (partial) name or phone, ordered by name.
+    Pass X-Next-Cursor back as after= for the next page.
+    """
+    clients, next_cursor = search_clients(db, q, limit, after)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return clients
+
 @router.get("/", response_model=List[ClientSchema], dependencies=[Depends(get_current_admin)])
 def get_clients(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
     """
     Admin only: List all clients.
     """
     return db.query(Client).offset(skip).limit(limit).all()
+
+@router.get("/export", dependencies=[Depends(get_current_admin)])
+def export_clients_file(format: ExportFormat = Query(ExportFormat.CSV)):
+    """
+    Admin only: stream the whole client table as CSV or NDJSON.
+    """
+    return StreamingResponse(export_clients(format), media_type=MEDIA_TYPES[format], headers=export_headers("clients", format))
+
+RECENT_APPOINTMENTS = 10
+
+@router.get("/{id}/profile", response_model=ClientProfile, dependencies=[Depends(get_current_admin)])
+def get_client_profile(id: int, db: Session = Depends(get_db)):
+    """
+    Admin only: client data, visit statistics (pre-aggregated in client_stats)
+    and the latest appointments.
+    """
+    client = db.get(Client, id)
+    if not client:
+        raise HTTPException(status_code=404, detail="Client not found")
+
+    stats = get_client_stats(db, id)
+    recent = db.query(Appointment).options(joinedload(Appointment.service)).filter(
+        Appointment.client_id == id
+    ).order_by(Appointment.date.desc(), Appointment.start_min.desc()).limit(RECENT_APPOINTMENTS).all()
+
+    return ClientProfile(
+        **ClientSchema.model_validate(client).model_dump(),
+        stats=ClientStats.model_validate(stats) if stats else ClientStats(),
+        recent_appointments=recent
+    )
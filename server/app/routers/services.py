@@ -1,16 +1,23 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 
 from app.schemas.service import ServiceCreate, ServiceUpdate, ServiceOut
 from app.models.service import Service
-from app.core.deps import get_db, get_current_admin
+from app.core.deps import get_db, get_async_db, get_current_admin
+from app.core import etag
+from app.services.slot_cache import slot_cache
+from app.services.catalog import bump_version, list_active_services_async
 
 router = APIRouter()
 
 @router.get("/", response_model=List[ServiceOut])
-def read_services(db: Session = Depends(get_db)):
-    return db.query(Service).filter(Service.active == True).all()
+async def read_services(request: Request, response: Response, db: AsyncSession = Depends(get_async_db)):
+    not_modified = etag.check_etag(request, response, "services")
+    if not_modified:
+        return not_modified
+    return await list_active_services_async(db)
 
 @router.post("/", response_model=ServiceOut, dependencies=[Depends(get_current_admin)])
 def create_service(service_in: ServiceCreate, db: Session = Depends(get_db)):
@@ -18,6 +25,8 @@ def create_service(service_in: ServiceCreate, db: Session = Depends(get_db)):
     db.add(service)
     db.commit()
     db.refresh(service)
+    bump_version()
+    slot_cache.invalidate_service(service.id)
     return service
 
 @router.put("/{id}", response_model=ServiceOut, dependencies=[Depends(get_current_admin)])
@@ -33,6 +42,8 @@ def update_service(id: int, service_in: ServiceUpdate, db: Session = Depends(get
     db.add(service)
     db.commit()
     db.refresh(service)
+    bump_version()
+    slot_cache.invalidate_service(service.id)
     return service
 
 @router.delete("/{id}", dependencies=[Depends(get_current_admin)])
@@ -44,4 +55,6 @@ def delete_service(id: int, db: Session = Depends(get_db)):
     service.active = False
     db.add(service)
     db.commit()
+    bump_version()
+    slot_cache.invalidate_service(id)
     return {"ok": True}
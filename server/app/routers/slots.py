@@ -1,20 +1,101 @@
-from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from datetime import date
-from app.core.deps import get_db
-from app.services.slot_generator import generate_slots
-from app.schemas.appointment import SlotSchema
+from app.core.deps import get_async_db
+from app.core import etag
+from app.core.time import get_current_time
+from app.services.slot_generator import (
+    generate_slots_async, generate_slots_range_async, generate_slots_any_staff_async, find_next_slots_async
+)
+from app.schemas.appointment import SlotSchema, DaySlotsSchema, NextSlotSchema
 
 router = APIRouter()
 
+MAX_RANGE_DAYS = 62
+
+# Every input of slot generation
+SLOT_RESOURCES = ("services", "availability", "blocks", "appointments")
+
+def _check_slots_etag(request: Request, response: Response, start_date: date, end_date: date):
+    # Slots also depend on the clock: past days are empty and today's past times drop out every minute
+    now = get_current_time()
+    clock = now.strftime("%Y-%m-%d %H:%M") if start_date <= now.date() <= end_date else now.strftime("%Y-%m-%d")
+    return etag.check_etag(request, response, *SLOT_RESOURCES, extra=f"{request.url.query}|{clock}")
+
 @router.get("/", response_model=List[SlotSchema])
-def get_slots(
+async def get_slots(
+    request: Request,
+    response: Response,
     date: date,
     service_id: int,
     staff_id: Optional[int] = None,
-    db: Session = Depends(get_db)
+    any_staff: bool = False,
+    db: AsyncSession = Depends(get_async_db)
 ):
-    slots = generate_slots(db, date, service_id, staff_id)
+    not_modified = _check_slots_etag(request, response, date, date)
+    if not_modified:
+        return not_modified
+
+    if any_staff:
+        # "Any stylist": union of every active staff member's free slots
+        slots = await generate_slots_any_staff_async(db, date, service_id)
+        return [SlotSchema(start_time=s["start_time"], end_time=s["end_time"], available=True, staff_ids=s["staff_ids"]) for s in slots]
+
+    slots = await generate_slots_async(db, date, service_id, staff_id)
     # Convert dict to schema
     return [SlotSchema(start_time=s["start_time"], end_time=s["end_time"], available=True) for s in slots]
+
+@router.get("/range", response_model=List[DaySlotsSchema])
+async def get_slots_range(
+    request: Request,
+    response: Response,
+    start_date: date = Query(..., alias="from"),
+    end_date: date = Query(..., alias="to"),
+    service_id: int = Query(...),
+    staff_id: Optional[int] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Slots for every day of a calendar window (week / month views) in a single call.
+    """
+    if end_date < start_date:
+        raise HTTPException(status_code=400, detail="'to' must be on or after 'from'")
+    if (end_date - start_date).days >= MAX_RANGE_DAYS:
+        raise HTTPException(status_code=400, detail=f"Range cannot exceed {MAX_RANGE_DAYS} days")
+
+    not_modified = _check_slots_etag(request, response, start_date, end_date)
+    if not_modified:
+        return not_modified
+
+    days = await generate_slots_range_async(db, start_date, end_date, service_id, staff_id)
+    return [
+        DaySlotsSchema(
+            date=d["date"],
+            slots=[SlotSchema(start_time=s["start_time"], end_time=s["end_time"], available=True) for s in d["slots"]]
+        )
+        for d in days
+    ]
+
+@router.get("/next", response_model=List[NextSlotSchema])
+async def get_next_slots(
+    request: Request,
+    response: Response,
+    service_id: int,
+    staff_id: Optional[int] = None,
+    limit: int = Query(5, ge=1, le=50),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Earliest available slots from now on ("the first time I can get a haircut").
+    """
+    today = get_current_time().date()
+    not_modified = _check_slots_etag(request, response, today, today)
+    if not_modified:
+        return not_modified
+
+    slots = await find_next_slots_async(db, service_id, staff_id, limit)
+    return [
+        NextSlotSchema(date=s["date"], start_time=s["start_time"], end_time=s["end_time"], available=True)
+        for s in slots
+    ]
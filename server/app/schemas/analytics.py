@@ -0,0 +1,24 @@
+from pydantic import BaseModel
+from typing import Optional
+from enum import Enum
+
+class RollupPeriod(str, Enum):
+    DAY = "day"
+    MONTH = "month"
+
+class RollupGroup(str, Enum):
+    SERVICE = "service"
+    STAFF = "staff"
+
+class RollupRow(BaseModel):
+    period: str  # YYYY-MM-DD or YYYY-MM
+    service_id: Optional[int] = None
+    staff_id: Optional[int] = None
+    pending: int = 0
+    confirmed: int = 0
+    cancelled: int = 0
+    no_show: int = 0
+    finished: int = 0
+    booked_min: int = 0
+    revenue_paid: float = 0
+    revenue_unpaid: float = 0
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import List, Optional
 from datetime import date
 from enum import Enum
 
@@ -31,6 +31,13 @@ class AppointmentCreate(BaseModel):
     note: Optional[str] = None
     is_paid: bool = False
 
+class AppointmentImportRow(AppointmentCreate):
+    status: AppointmentStatus = AppointmentStatus.PENDING
+
+class AppointmentImportResult(BaseModel):
+    imported: int
+    clients_created: int
+
 class AppointmentReschedule(BaseModel):
     date: date
     start_time: str
@@ -54,3 +61,11 @@ class SlotSchema(BaseModel):
     start_time: str
     end_time: str
     available: bool = True
+    staff_ids: Optional[List[int]] = None  # Only set in any_staff mode
+
+class DaySlotsSchema(BaseModel):
+    date: date
+    slots: List[SlotSchema]
+
+class NextSlotSchema(SlotSchema):
+    date: date
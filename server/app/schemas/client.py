@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from datetime import datetime
+from datetime import date, datetime
 from typing import Optional, List
 
 class ClientBase(BaseModel):
@@ -19,3 +19,20 @@ class Client(ClientBase):
 
 class ClientSearch(BaseModel):
     phone: str
+
+class ClientStats(BaseModel):
+    appointments: int = 0
+    visits: int = 0
+    no_shows: int = 0
+    cancellations: int = 0
+    total_paid: float = 0
+    last_visit: Optional[date] = None
+
+    class Config:
+        from_attributes = True
+
+from app.schemas.appointment import AppointmentOut
+
+class ClientProfile(Client):
+    stats: ClientStats
+    recent_appointments: List[AppointmentOut]
@@ -0,0 +1,136 @@
+from datetime import date
+from typing import List, Optional
+from fastapi import HTTPException
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Session, joinedload
+from app.models.appointment import Appointment, AppointmentStatus
+from app.models.service import Service
+from app.core.pagination import encode_cursor, decode_cursor
+from app.core.time import min_to_time
+
+# Admin listing order; (date, start_min, id) is unique, so it doubles as the keyset
+LISTING_ORDER = (Appointment.date, Appointment.start_min, Appointment.id)
+
+# fields= names (same as AppointmentOut) -> columns
+PROJECTABLE = {
+    "id": Appointment.id,
+    "date": Appointment.date,
+    "start_time": Appointment.start_min,
+    "end_time": Appointment.end_min,
+    "service_id": Appointment.service_id,
+    "staff_id": Appointment.staff_id,
+    "client_name": Appointment.client_name,
+    "client_phone": Appointment.client_phone,
+    "note": Appointment.note,
+    "is_paid": Appointment.is_paid,
+    "status": Appointment.status,
+}
+SERVICE_COLUMNS = (Service.id, Service.name, Service.duration_min, Service.price, Service.active)
+
+def filter_appointments(
+    query,
+    from_date: Optional[date] = None,
+    to_date: Optional[date] = None,
+    date_eq: Optional[date] = None,
+    status: Optional[List[AppointmentStatus]] = None,
+    staff_id: Optional[int] = None,
+    service_id: Optional[int] = None
+):
+    if date_eq:
+        query = query.filter(Appointment.date == date_eq)
+    else:
+        if from_date:
+            query = query.filter(Appointment.date >= from_date)
+        if to_date:
+            query = query.filter(Appointment.date <= to_date)
+    if status:
+        query = query.filter(Appointment.status.in_([AppointmentStatus(s) for s in status]))
+    if staff_id:
+        query = query.filter(Appointment.staff_id == staff_id)
+    if service_id:
+        query = query.filter(Appointment.service_id == service_id)
+    return query
+
+def parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    if not fields:
+        return None
+    names = list(dict.fromkeys(f.strip() for f in fields.split(",") if f.strip()))
+    unknown = [f for f in names if f not in PROJECTABLE and f != "service"]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    return names
+
+def _page(query, limit: Optional[int], after: Optional[str]):
+    if after:
+        d, start_min, appt_id = decode_cursor(after, 3)
+        try:
+            key = (date.fromisoformat(d), int(start_min), int(appt_id))
+        except (TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        query = query.filter(tuple_(*LISTING_ORDER) > key)
+    query = query.order_by(*LISTING_ORDER)
+    if limit:
+        # One extra row tells whether there is a next page
+        query = query.limit(limit + 1)
+    return query
+
+def _next_cursor(rows, limit: Optional[int], key):
+    """Trim the extra row of a page; key(row) gives its (date, start_min, id)."""
+    if not limit or len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    d, start_min, appt_id = key(rows[-1])
+    return rows, encode_cursor(d.isoformat(), start_min, appt_id)
+
+def list_appointments(db: Session, limit: Optional[int] = None, after: Optional[str] = None, **filters):
+    """
+    ORM appointments (with their service) in agenda order, one keyset page when limit is set.
+    Returns (appointments, next_cursor or None).
+    """
+    query = db.query(Appointment).options(joinedload(Appointment.service))
+    query = _page(filter_appointments(query, **filters), limit, after)
+    return _next_cursor(query.all(), limit, lambda a: (a.date, a.start_min, a.id))
+
+def list_appointments_projected(
+    db: Session,
+    fields: List[str],
+    limit: Optional[int] = None,
+    after: Optional[str] = None,
+    **filters
+):
+    """
+    Like list_appointments but selecting only the requested columns, as plain dicts.
+    "service" adds the nested service object through an outer join.
+    """
+    with_service = "service" in fields
+    columns = [PROJECTABLE[f].label(f) for f in fields if f != "service"]
+    # The keyset columns are always read, the cursor needs them
+    keyset = [c.label(f"_key_{c.key}") for c in LISTING_ORDER]
+    service_columns = [c.label(f"_service_{c.key}") for c in SERVICE_COLUMNS] if with_service else []
+
+    query = db.query(*columns, *keyset, *service_columns)
+    if with_service:
+        query = query.outerjoin(Service, Service.id == Appointment.service_id)
+    else:
+        query = query.select_from(Appointment)
+    query = _page(filter_appointments(query, **filters), limit, after)
+
+    page, next_cursor = _next_cursor(
+        [r._mapping for r in query.all()], limit,
+        lambda m: (m["_key_date"], m["_key_start_min"], m["_key_id"])
+    )
+    items = []
+    for m in page:
+        item = {}
+        for f in fields:
+            if f == "service":
+                item[f] = None if m["_service_id"] is None else {c.key: m[f"_service_{c.key}"] for c in SERVICE_COLUMNS}
+                continue
+            value = m[f]
+            if f in ("start_time", "end_time"):
+                value = min_to_time(value)
+            elif f == "status":
+                value = value.value
+            item[f] = value
+        items.append(item)
+    return items, next_cursor
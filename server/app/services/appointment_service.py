@@ -1,47 +1,64 @@
+from collections import defaultdict
+from typing import List
 from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
 from fastapi import HTTPException
-from app.models.appointment import Appointment, AppointmentStatus
-from app.models.service import Service
-from app.schemas.appointment import AppointmentCreate, AppointmentReschedule
-from app.services.slot_generator import is_overlapping, time_to_min, parse_time, min_to_time
+from app.models.appointment import Appointment, AppointmentStatus, NO_OVERLAP_CONSTRAINT
+from app.services.catalog import get_service
+from app.schemas.appointment import AppointmentCreate, AppointmentReschedule, AppointmentImportRow
+from app.services.slot_generator import load_day_occupancy, ACTIVE_STATUSES
+from app.services.slot_cache import slot_cache
+from app.core import etag
+from app.core.time import hhmm_to_min
 
 from app.models.client import Client
-from app.services.whatsapp import send_whatsapp_sync
-from app.services.telegram import send_telegram_sync
+from app.core.config import settings
+from app.services.notifications import enqueue_whatsapp, enqueue_telegram
+from app.services import rollup
 
 
+def invalidate_appointment_dates(dates):
+    """Drop cached slots and move the appointments ETag version after a committed change."""
+    slot_cache.invalidate_dates(dates)
+    etag.bump("appointments")
+
+def _commit_or_conflict(db: Session, detail: str):
+    """
+    Commit, turning a violation of the no-overlap exclusion constraint into the usual 400.
+    The database is the single source of truth for double bookings, even under concurrent requests.
+    """
+    try:
+        db.commit()
+    except IntegrityError as e:
+        db.rollback()
+        if NO_OVERLAP_CONSTRAINT in str(e.orig):
+            raise HTTPException(status_code=400, detail=detail)
+        raise
+
+def _booking_message(appt: Appointment, service_name: str) -> str:
+    return (f"¡Hola {appt.client_name}! 💇‍♀️ Reservaste un turno en Roma Cabello:\n"
+            f"📅 Fecha: {appt.date}\n"
+            f"🕒 Hora: {appt.start_time}\n"
+            f"✨ Servicio: {service_name}\n\n"
+            f"✅ *Tu turno ha sido registrado correctamente.*\n"
+            f"Te enviaremos un mensaje más cerca de la fecha para confirmar tu asistencia.")
+
 def create_appointment(db: Session, appt_in: AppointmentCreate) -> Appointment:
     # 1. Get Service
-    service = db.query(Service).filter(Service.id == appt_in.service_id).first()
+    service = get_service(db, appt_in.service_id)
     if not service:
         raise HTTPException(status_code=404, detail="Service not found")
         
     duration = service.duration_min
-    start_min = time_to_min(parse_time(appt_in.start_time))
+    start_min = hhmm_to_min(appt_in.start_time)
     end_min = start_min + duration
-    end_time = min_to_time(end_min)
     
-    # 2. Validate availability
-    query = db.query(Appointment).filter(
-        Appointment.date == appt_in.date,
-        Appointment.status.in_([AppointmentStatus.PENDING, AppointmentStatus.CONFIRMED, AppointmentStatus.FINISHED])
-    )
-
-    if appt_in.staff_id:
-        query = query.filter(Appointment.staff_id == appt_in.staff_id)
-    else:
-        # If staff_id is None, it means the service doesn't require specific staff or it's a general slot?
-        # The prompt says "staff_id (nullable)".
-        # We assume if staff_id is None in appt_in, we check general availability (no staff assigned slots).
-        query = query.filter(Appointment.staff_id.is_(None))
-        
-    existing_appts = query.all()
-    
-    for existing in existing_appts:
-        e_start = time_to_min(parse_time(existing.start_time))
-        e_end = time_to_min(parse_time(existing.end_time))
-        if is_overlapping(start_min, end_min, e_start, e_end):
-             raise HTTPException(status_code=400, detail="Slot is not available")
+    # 2. Validate availability: the whole service must fit inside an availability range
+    # and clear of blocks. Overlaps with other appointments are rejected by the
+    # exclusion constraint on INSERT.
+    occupancy = load_day_occupancy(db, appt_in.date, appt_in.staff_id, with_appointments=False)
+    if occupancy is None or not occupancy.fits(start_min, duration):
+        raise HTTPException(status_code=400, detail="Slot is not available")
 
     # 3. Handle Client (Find or Create)
     client = db.query(Client).filter(Client.phone == appt_in.client_phone).first()
@@ -61,8 +78,8 @@ def create_appointment(db: Session, appt_in: AppointmentCreate) -> Appointment:
     # 4. Create Appointment
     appt = Appointment(
         date=appt_in.date,
-        start_time=appt_in.start_time,
-        end_time=end_time,
+        start_min=start_min,
+        end_min=end_min,
         service_id=appt_in.service_id,
         staff_id=appt_in.staff_id,
         client_name=appt_in.client_name,
@@ -70,21 +87,15 @@ def create_appointment(db: Session, appt_in: AppointmentCreate) -> Appointment:
         client_id=client.id, # Link to client
         note=appt_in.note,
         is_paid=appt_in.is_paid,
+        price=service.price,
         status=AppointmentStatus.PENDING
     )
     db.add(appt)
-    db.commit()
-    db.refresh(appt)
+    rollup.record_change(db, None, rollup.snapshot(appt))
     
+    # Notifications are queued in the same transaction and delivered by the outbox dispatcher
     # Notify Client (Request Received)
-    # Notify Client (Request Received)
-    client_msg = (f"¡Hola {appt.client_name}! 💇‍♀️ Reservaste un turno en Roma Cabello:\n"
-                  f"📅 Fecha: {appt.date}\n"
-                  f"🕒 Hora: {appt.start_time}\n"
-                  f"✨ Servicio: {service.name}\n\n"
-                  f"✅ *Tu turno ha sido registrado correctamente.*\n"
-                  f"Te enviaremos un mensaje más cerca de la fecha para confirmar tu asistencia.")
-    send_whatsapp_sync(appt.client_phone, client_msg)
+    enqueue_whatsapp(db, appt.client_phone, _booking_message(appt, service.name))
     
     # Notify Admin (Telegram)
     admin_msg = (f"<b>🚨 ¡NUEVA SOLICITUD DE TURNO! 🚨</b>\n\n"
@@ -93,129 +104,274 @@ def create_appointment(db: Session, appt_in: AppointmentCreate) -> Appointment:
                  f"📅 <b>Fecha:</b> {appt.date}\n"
                  f"🕒 <b>Hora:</b> {appt.start_time}\n"
                  f"✨ <b>Servicio:</b> {service.name}")
-    send_telegram_sync(admin_msg)
+    enqueue_telegram(db, admin_msg)
+
+    _commit_or_conflict(db, "Slot is not available")
+    db.refresh(appt)
+    invalidate_appointment_dates([appt.date])
     
     return appt
 
+MAX_IMPORT_ROWS = 2000
+
+def _find_overlaps(intervals) -> dict:
+    """
+    One sorted sweep over the intervals of a single (date, staff) agenda.
+    intervals: [(start_min, end_min, row_index or None for rows already stored, appointment_id)].
+    Returns {row_index: detail} for batch rows that overlap a stored appointment or an
+    earlier accepted row, whichever of the two starts first.
+    """
+    conflicts = {}
+    # Stored appointments and accepted batch rows are tracked apart, so a stored
+    # appointment starting inside an open batch row still rejects that row.
+    # Accepted rows never overlap each other, so at most one of them is open.
+    stored_until, stored_id = -1, None
+    batch_until, batch_row = -1, None
+    for start, end, row, appt_id in sorted(intervals, key=lambda iv: (iv[0], iv[1], iv[2] is not None)):
+        if row is None:
+            if start < batch_until:
+                conflicts[batch_row] = f"Overlaps appointment #{appt_id}"
+                batch_until, batch_row = -1, None  # Rejected rows do not occupy the agenda
+            if end > stored_until:
+                stored_until, stored_id = end, appt_id
+        elif start < stored_until:
+            conflicts[row] = f"Overlaps appointment #{stored_id}"
+        elif start < batch_until:
+            conflicts[row] = f"Overlaps row {batch_row}"
+        else:
+            batch_until, batch_row = end, row
+    return conflicts
+
+def import_appointments(db: Session, rows: List[AppointmentImportRow], notify: bool = False) -> dict:
+    """
+    Bulk import (migrations from other agendas). All rows are validated first: unknown
+    services, bad times and overlaps with stored appointments or with other rows of the
+    batch are reported together as a 400 and nothing is written. Otherwise clients are
+    upserted and every appointment is inserted in a single transaction.
+    Notifications are only queued when notify is set.
+    """
+    if len(rows) > MAX_IMPORT_ROWS:
+        raise HTTPException(status_code=400, detail=f"Cannot import more than {MAX_IMPORT_ROWS} rows at once")
+    if not rows:
+        return {"imported": 0, "clients_created": 0}
+
+    errors = {}
+    services = {}
+    groups = defaultdict(list)  # (date, staff_id) -> [(start_min, end_min, row, None)]
+    minutes = {}
+    for i, row in enumerate(rows):
+        service = get_service(db, row.service_id)
+        if not service:
+            errors[i] = "Service not found"
+            continue
+        try:
+            start_min = hhmm_to_min(row.start_time)
+        except ValueError:
+            start_min = None
+        # The service must also end within the same day
+        if start_min is None or start_min + service.duration_min > 24 * 60:
+            errors[i] = "Invalid start_time"
+            continue
+        end_min = start_min + service.duration_min
+        services[i] = service
+        minutes[i] = (start_min, end_min)
+        if row.status in ACTIVE_STATUSES:
+            groups[(row.date, row.staff_id or None)].append((start_min, end_min, i, None))
+
+    # Active appointments already stored on the imported days, one query for the whole batch
+    if groups:
+        existing = db.query(
+            Appointment.id, Appointment.staff_id, Appointment.date, Appointment.start_min, Appointment.end_min
+        ).filter(
+            Appointment.date.in_({d for d, _ in groups}),
+            Appointment.status.in_(ACTIVE_STATUSES)
+        ).all()
+        for a in existing:
+            key = (a.date, a.staff_id)
+            if key in groups:
+                groups[key].append((a.start_min, a.end_min, None, a.id))
+
+    for intervals in groups.values():
+        errors.update(_find_overlaps(intervals))
+
+    if errors:
+        raise HTTPException(status_code=400, detail={
+            "message": "Import rejected, nothing was saved",
+            "errors": [{"row": i, "detail": errors[i]} for i in sorted(errors)]
+        })
+
+    # Clients: one lookup for the batch, create the missing ones (first name seen wins)
+    phones = {row.client_phone for row in rows}
+    clients = {c.phone: c for c in db.query(Client).filter(Client.phone.in_(phones)).all()}
+    new_clients = {}
+    for row in rows:
+        if row.client_phone not in clients and row.client_phone not in new_clients:
+            new_clients[row.client_phone] = Client(name=row.client_name, phone=row.client_phone)
+    db.add_all(new_clients.values())
+    db.flush()
+    clients.update(new_clients)
+
+    appts = []
+    for i, row in enumerate(rows):
+        start_min, end_min = minutes[i]
+        appts.append(Appointment(
+            date=row.date,
+            start_min=start_min,
+            end_min=end_min,
+            service_id=row.service_id,
+            staff_id=row.staff_id,
+            client_name=row.client_name,
+            client_phone=row.client_phone,
+            client_id=clients[row.client_phone].id,
+            note=row.note,
+            is_paid=row.is_paid,
+            price=services[i].price,
+            status=row.status
+        ))
+    db.add_all(appts)
+    rollup.record_changes(db, ((None, rollup.snapshot(appt)) for appt in appts))
+
+    if notify:
+        for i, appt in enumerate(appts):
+            if appt.status in (AppointmentStatus.PENDING, AppointmentStatus.CONFIRMED):
+                enqueue_whatsapp(db, appt.client_phone, _booking_message(appt, services[i].name))
+        enqueue_telegram(db, f"<b>📥 Importación de turnos</b>\n\n{len(appts)} turnos importados.")
+
+    # Rows stored concurrently with the import are still caught by the exclusion constraint
+    _commit_or_conflict(db, "Import overlaps an appointment booked meanwhile, nothing was saved")
+    invalidate_appointment_dates({appt.date for appt in appts})
+
+    return {"imported": len(appts), "clients_created": len(new_clients)}
+
 def cancel_appointment(db: Session, id: int) -> Appointment:
-    appt = db.query(Appointment).filter(Appointment.id == id).first()
+    # Locked so concurrent changes cannot both apply their rollup delta to the same old state
+    appt = db.query(Appointment).filter(Appointment.id == id).with_for_update().first()
     if not appt:
         raise HTTPException(status_code=404, detail="Appointment not found")
+    before = rollup.snapshot(appt)
     
     appt.status = AppointmentStatus.CANCELLED
-    db.commit()
-    db.refresh(appt)
+    rollup.record_change(db, before, rollup.snapshot(appt))
     
     # Notify Cancellation
     msg = (f"Hola {appt.client_name}. Te informamos que tu turno para el día {appt.date} "
            f"a las {appt.start_time} ha sido CANCELADO. Si fue un error, por favor contactanos.")
-    send_whatsapp_sync(appt.client_phone, msg)
+    enqueue_whatsapp(db, appt.client_phone, msg)
     
     # Notify Admin Cancellation
-    from app.services.whatsapp import settings
     if settings.ADMIN_PHONE:
         admin_cancel_msg = (f"❌ Turno Cancelado ❌\n👤 Cliente: {appt.client_name}\n📅 Fecha: {appt.date}\n🕒 Hora: {appt.start_time}")
-        send_whatsapp_sync(settings.ADMIN_PHONE, admin_cancel_msg)
+        enqueue_whatsapp(db, settings.ADMIN_PHONE, admin_cancel_msg)
+    
+    db.commit()
+    db.refresh(appt)
+    invalidate_appointment_dates([appt.date])
     
     return appt
 
 def confirm_appointment(db: Session, id: int) -> Appointment:
-    appt = db.query(Appointment).filter(Appointment.id == id).first()
+    appt = db.query(Appointment).filter(Appointment.id == id).with_for_update().first()
     if not appt:
         raise HTTPException(status_code=404, detail="Appointment not found")
+    before = rollup.snapshot(appt)
+    reactivated = appt.status not in ACTIVE_STATUSES
     
     appt.status = AppointmentStatus.CONFIRMED
-    db.commit()
-    db.refresh(appt)
+    rollup.record_change(db, before, rollup.snapshot(appt))
     
     # Notify Client via WhatsApp
     msg = (f"¡Hola {appt.client_name}! 💇‍♀️ Tu turno en Roma Cabello ha sido **CONFIRMADO** por el peluquero.\n"
            f"📅 Fecha: {appt.date}\n"
            f"🕒 Hora: {appt.start_time}\n"
            f"¡Te esperamos!")
-    send_whatsapp_sync(appt.client_phone, msg)
+    enqueue_whatsapp(db, appt.client_phone, msg)
+    
+    # Re-activating a cancelled appointment can collide with a newer booking
+    _commit_or_conflict(db, "Slot is not available")
+    db.refresh(appt)
+    if reactivated:
+        invalidate_appointment_dates([appt.date])
     
     return appt
 
 def finish_appointment(db: Session, id: int, is_paid: bool = False) -> Appointment:
-    appt = db.query(Appointment).filter(Appointment.id == id).first()
+    appt = db.query(Appointment).filter(Appointment.id == id).with_for_update().first()
     if not appt:
         raise HTTPException(status_code=404, detail="Appointment not found")
+    before = rollup.snapshot(appt)
+    reactivated = appt.status not in ACTIVE_STATUSES
     
     appt.status = AppointmentStatus.FINISHED
     appt.is_paid = is_paid
-    db.commit()
+    rollup.record_change(db, before, rollup.snapshot(appt))
+    _commit_or_conflict(db, "Slot is not available")
     db.refresh(appt)
+    if reactivated:
+        invalidate_appointment_dates([appt.date])
     return appt
 
 def reschedule_appointment(db: Session, id: int, parsed: AppointmentReschedule) -> Appointment:
-    appt = db.query(Appointment).filter(Appointment.id == id).first()
+    appt = db.query(Appointment).filter(Appointment.id == id).with_for_update().first()
     if not appt:
         raise HTTPException(status_code=404, detail="Appointment not found")
+    before = rollup.snapshot(appt)
         
     # Recalculate end time
-    service = appt.service
+    service = get_service(db, appt.service_id)
     duration = service.duration_min
-    start_min = time_to_min(parse_time(parsed.start_time))
+    start_min = hhmm_to_min(parsed.start_time)
     end_min = start_min + duration
-    end_time = min_to_time(end_min)
-    
-    # Validate overlap
-    # Exclude self
-    query = db.query(Appointment).filter(
-        Appointment.date == parsed.date,
-        Appointment.status.in_([AppointmentStatus.CONFIRMED, AppointmentStatus.FINISHED]),
-        Appointment.id != id
-    )
-    if appt.staff_id:
-        query = query.filter(Appointment.staff_id == appt.staff_id)
-    else:
-        query = query.filter(Appointment.staff_id.is_(None))
-    
-    existing_appts = query.all()
-    for existing in existing_appts:
-        e_start = time_to_min(parse_time(existing.start_time))
-        e_end = time_to_min(parse_time(existing.end_time))
-        if is_overlapping(start_min, end_min, e_start, e_end):
-             raise HTTPException(status_code=400, detail="New slot is not available")
-             
+    
+    old_date = appt.date
     appt.date = parsed.date
-    appt.start_time = parsed.start_time
-    appt.end_time = end_time
+    appt.start_min = start_min
+    appt.end_min = end_min
     
     if appt.status == AppointmentStatus.CANCELLED:
         appt.status = AppointmentStatus.CONFIRMED
+    rollup.record_change(db, before, rollup.snapshot(appt))
         
-    db.commit()
-    db.refresh(appt)
-    
     # Notify Reschedule
     msg = (f"¡Hola {appt.client_name}! Tu turno ha sido REPROGRAMADO:\n"
            f"📅 Nueva fecha: {appt.date}\n"
            f"🕒 Nueva hora: {appt.start_time}\n"
            f"¡Te esperamos!")
-    send_whatsapp_sync(appt.client_phone, msg)
+    enqueue_whatsapp(db, appt.client_phone, msg)
+    
+    # Overlaps (other than with itself) are rejected by the exclusion constraint
+    _commit_or_conflict(db, "New slot is not available")
+    db.refresh(appt)
+    invalidate_appointment_dates([old_date, appt.date])
     
     return appt
 
 def update_appointment(db: Session, id: int, appt_in: any) -> Appointment:
-    appt = db.query(Appointment).filter(Appointment.id == id).first()
+    appt = db.query(Appointment).filter(Appointment.id == id).with_for_update().first()
     if not appt:
         raise HTTPException(status_code=404, detail="Appointment not found")
+    before = rollup.snapshot(appt)
     
     update_data = appt_in.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(appt, field, value)
+    rollup.record_change(db, before, rollup.snapshot(appt))
     
-    db.commit()
+    # Re-activating a cancelled appointment can collide with a newer booking
+    _commit_or_conflict(db, "Slot is not available")
     db.refresh(appt)
+    if "status" in update_data:
+        invalidate_appointment_dates([appt.date])
     return appt
 
 def delete_appointment(db: Session, id: int) -> bool:
-    appt = db.query(Appointment).filter(Appointment.id == id).first()
+    appt = db.query(Appointment).filter(Appointment.id == id).with_for_update().first()
     if not appt:
         raise HTTPException(status_code=404, detail="Appointment not found")
+    before = rollup.snapshot(appt)
     
+    appt_date = appt.date
     db.delete(appt)
+    rollup.record_change(db, before, None)
     db.commit()
+    invalidate_appointment_dates([appt_date])
     return True
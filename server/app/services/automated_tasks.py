@@ -1,9 +1,16 @@
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, date
+from sqlalchemy import and_, or_, func
 from sqlalchemy.orm import Session
 from app.db.session import SessionLocal
 from app.models.appointment import Appointment, AppointmentStatus
 from app.models.service import Service
 from app.services.whatsapp import send_whatsapp_sync
+from app.services.notifications import dispatch_pending_notifications
+from app.services.inbox import process_inbound_messages
+from app.services.idempotency import purge_expired_keys
+from app.core.config import settings
+from app.core.time import min_to_time, get_current_time
 import logging
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.interval import IntervalTrigger
@@ -15,91 +22,113 @@ scheduler = BackgroundScheduler()
 def check_appointments_for_confirmation():
     return check_confirmations_v2()
 
+def _send_reminder(reminder: dict) -> bool:
+    logger.info(f"  > Intentando enviar WhatsApp a {reminder['phone']} (ID {reminder['id']})...")
+    try:
+        return send_whatsapp_sync(reminder["phone"], reminder["msg"])
+    except Exception as e:
+        logger.error(f"  > ERROR ENVIANDO ID {reminder['id']}: {e}")
+        return False
+
+# Lead time from booking to appointment that earns the early (day before) reminder
+LONG_LEAD = timedelta(hours=24)
+EARLY_REMINDER = timedelta(hours=25)
+LATE_REMINDER = timedelta(minutes=75)
+
+def _due_reminders_query(db: Session, now: datetime):
+    """
+    Pending, not yet asked appointments whose reminder is due at `now` (naive, local time),
+    joined with their service name. The 24h/1h rules are evaluated by Postgres:
+    bookings made at least LONG_LEAD ahead are reminded EARLY_REMINDER before, the rest LATE_REMINDER before.
+    """
+    appt_at = Appointment.date + func.make_interval(0, 0, 0, 0, 0, Appointment.start_min)
+    created_local = func.timezone(settings.TIMEZONE, Appointment.created_at)
+    long_lead = or_(Appointment.created_at.is_(None), created_local <= appt_at - LONG_LEAD)
+
+    return db.query(
+        Appointment.id, Appointment.client_name, Appointment.client_phone,
+        Appointment.date, Appointment.start_min, Service.name.label("service_name")
+    ).outerjoin(Service, Service.id == Appointment.service_id).filter(
+        Appointment.status == AppointmentStatus.PENDING,
+        Appointment.confirmation_sent_at.is_(None),
+        Appointment.date >= now.date(),
+        Appointment.date <= (now + timedelta(days=3)).date(),
+        or_(
+            appt_at <= now + LATE_REMINDER,
+            and_(long_lead, appt_at <= now + EARLY_REMINDER)
+        )
+    ).order_by(Appointment.date, Appointment.start_min)
+
 def check_confirmations_v2():
     db = SessionLocal()
     try:
-        now = datetime.now()
+        # Appointment dates and times are local, compare against the local wall clock
+        now = get_current_time().replace(tzinfo=None)
         logger.info(f"--- INICIO CHEQUEO V2 ({now.strftime('%H:%M:%S')}) ---")
-        
-        limit_date = (now + timedelta(days=3)).date()
-        today = now.date()
-        
-        q = db.query(Appointment.id).filter(
-            Appointment.status == AppointmentStatus.PENDING,
-            Appointment.confirmation_sent_at.is_(None),
-            Appointment.date >= today,
-            Appointment.date <= limit_date
-        )
-        ids = [r[0] for r in q.all()]
-        logger.info(f"Turnos candidatos encontrados: {ids}")
-
-        for aid in ids:
-            row = db.query(
-                Appointment.id, Appointment.client_name, Appointment.client_phone, 
-                Appointment.service_id, Appointment.date, Appointment.start_time, 
-                Appointment.created_at
-            ).filter(Appointment.id == aid).first()
-            if not row: continue
-
-            try:
-                # 1. Nombre servicio
-                service_name = "el servicio"
-                if row.service_id:
-                    svc = db.query(Service.name).filter(Service.id == row.service_id).first()
-                    if svc: service_name = svc[0]
-
-                # 2. Parsing tiempos
-                appt_time_obj = datetime.strptime(row.start_time, "%H:%M").time()
-                appt_dt = datetime.combine(row.date, appt_time_obj)
-                
-                # Normalizar lead time (quitar TZs)
-                created_at = row.created_at.replace(tzinfo=None) if row.created_at else (appt_dt - timedelta(days=2))
-                
-                lead_time = appt_dt - created_at
-                time_until = appt_dt - now
-
-                logger.info(f"ID {aid} ({row.client_name}): Lead={lead_time}, Until={time_until}")
-
-                should_send = False
-                if lead_time >= timedelta(hours=24):
-                    if time_until <= timedelta(hours=25): 
-                        should_send = True
-                        logger.info(f"  > Cumple REGLA 24H")
-                else:
-                    if time_until <= timedelta(minutes=75): 
-                        should_send = True
-                        logger.info(f"  > Cumple REGLA 1H")
-
-                if should_send:
-                    msg = (f"👋 Hola {row.client_name}\n\n"
-                           f"Confirmación de tu turno en *Roma Cabello*:\n"
-                           f"📅 *{row.date.strftime('%d/%m')}*\n"
-                           f"⏰ *{row.start_time} hs*\n"
-                           f"💇‍♀️ {service_name}\n\n"
-                           f"⚠️ Respondé con un 1 para confirmar o un 2 para cancelar.")
-                    
-                    logger.info(f"  > Intentando enviar WhatsApp a {row.client_phone}...")
-                    sent_ok = send_whatsapp_sync(row.client_phone, msg)
-                    
-                    if sent_ok:
-                        db.query(Appointment).filter(Appointment.id == aid).update({
-                            "confirmation_sent_at": datetime.now()
-                        })
-                        db.commit()
-                        logger.info(f"  > EXITOSO ✅")
-                    else:
-                        logger.error(f"  > FALLÓ EL ENVÍO (Bridge desconectado o error) ❌")
-
-            except Exception as e:
-                logger.error(f"  > ERROR EN PROCESO ID {aid}: {e}")
-                db.rollback()
+
+        # 1. One query for every due reminder
+        rows = _due_reminders_query(db, now).all()
+        logger.info(f"Turnos a recordar: {[row.id for row in rows]}")
+
+        reminders = []
+        for row in rows:
+            msg = (f"👋 Hola {row.client_name}\n\n"
+                   f"Confirmación de tu turno en *Roma Cabello*:\n"
+                   f"📅 *{row.date.strftime('%d/%m')}*\n"
+                   f"⏰ *{min_to_time(row.start_min)} hs*\n"
+                   f"💇‍♀️ {row.service_name or 'el servicio'}\n\n"
+                   f"⚠️ Respondé con un 1 para confirmar o un 2 para cancelar.")
+            reminders.append({"id": row.id, "phone": row.client_phone, "msg": msg})
+
+        if not reminders:
+            return
+
+        # 2. Send concurrently, at most REMINDER_CONCURRENCY requests in flight
+        with ThreadPoolExecutor(max_workers=max(1, settings.REMINDER_CONCURRENCY)) as pool:
+            results = list(pool.map(_send_reminder, reminders))
+
+        sent_ids = [r["id"] for r, ok in zip(reminders, results) if ok]
+        for r, ok in zip(reminders, results):
+            if not ok:
+                logger.error(f"  > FALLÓ EL ENVÍO ID {r['id']} (Bridge desconectado o error) ❌")
+
+        # 3. Persist every success in a single UPDATE
+        if sent_ids:
+            db.query(Appointment).filter(Appointment.id.in_(sent_ids)).update(
+                {"confirmation_sent_at": get_current_time()},
+                synchronize_session=False
+            )
+            db.commit()
+        logger.info(f"  > EXITOSOS ✅ {len(sent_ids)}/{len(reminders)}: {sent_ids}")
                 
     except Exception as e:
         logger.error(f"Error Crítico: {e}")
+        db.rollback()
     finally:
         db.close()
 
 def start_scheduler():
     if not scheduler.get_jobs():
         scheduler.add_job(check_confirmations_v2, trigger=IntervalTrigger(minutes=15), id="check_confirmations", replace_existing=True)
+        scheduler.add_job(
+            dispatch_pending_notifications,
+            trigger=IntervalTrigger(seconds=settings.NOTIFICATION_POLL_SECONDS),
+            id="dispatch_notifications",
+            replace_existing=True,
+            max_instances=1,
+            coalesce=True
+        )
+        scheduler.add_job(
+            process_inbound_messages,
+            trigger=IntervalTrigger(seconds=settings.INBOX_POLL_SECONDS),
+            id="process_inbox",
+            replace_existing=True,
+            max_instances=1,
+            coalesce=True
+        )
+        scheduler.add_job(purge_expired_keys, trigger=IntervalTrigger(hours=1), id="purge_idempotency_keys", replace_existing=True)
         scheduler.start()
+
+def stop_scheduler():
+    if scheduler.running:
+        scheduler.shutdown(wait=False)
@@ -0,0 +1,61 @@
+import threading
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from app.models.service import Service
+from app.core import etag
+
+@dataclass(frozen=True)
+class ServiceEntry:
+    id: int
+    name: str
+    duration_min: int
+    price: Optional[float]
+    active: bool
+
+_lock = threading.Lock()
+_loaded_version = -1  # "services" change version the cached catalog was read at
+_services: Dict[int, ServiceEntry] = {}
+
+def bump_version():
+    """Mark the cached catalog stale. Call after committing a change to the service table."""
+    etag.bump("services")
+
+def _catalog_statement():
+    return select(Service).order_by(Service.id)
+
+def _store_catalog(rows, version: int) -> Dict[int, ServiceEntry]:
+    global _services, _loaded_version
+    services = {
+        s.id: ServiceEntry(id=s.id, name=s.name, duration_min=s.duration_min, price=s.price, active=bool(s.active))
+        for s in rows
+    }
+    with _lock:
+        # A write during the load leaves the version ahead, so the next call reloads
+        _services = services
+        _loaded_version = version
+    return services
+
+def _catalog(db: Session) -> Dict[int, ServiceEntry]:
+    version = etag.current("services")
+    if _loaded_version == version:
+        return _services
+    return _store_catalog(db.execute(_catalog_statement()).scalars().all(), version)
+
+async def _catalog_async(db: AsyncSession) -> Dict[int, ServiceEntry]:
+    version = etag.current("services")
+    if _loaded_version == version:
+        return _services
+    result = await db.execute(_catalog_statement())
+    return _store_catalog(result.scalars().all(), version)
+
+def get_service(db: Session, service_id: int) -> Optional[ServiceEntry]:
+    return _catalog(db).get(service_id)
+
+async def get_service_async(db: AsyncSession, service_id: int) -> Optional[ServiceEntry]:
+    return (await _catalog_async(db)).get(service_id)
+
+async def list_active_services_async(db: AsyncSession) -> List[ServiceEntry]:
+    return [s for s in (await _catalog_async(db)).values() if s.active]
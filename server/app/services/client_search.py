@@ -0,0 +1,47 @@
+import re
+from typing import List, Optional, Tuple
+from fastapi import HTTPException
+from sqlalchemy import func, or_, tuple_
+from sqlalchemy.orm import Session
+from app.models.client import Client
+from app.core.pagination import encode_cursor, decode_cursor, escape_like
+
+_NON_DIGITS = re.compile(r"\D")
+
+# Shorter phone fragments match too many numbers to be useful
+MIN_PHONE_DIGITS = 3
+
+def search_clients(
+    db: Session,
+    q: str,
+    limit: int = 20,
+    after: Optional[str] = None
+) -> Tuple[List[Client], Optional[str]]:
+    """
+    Clients whose name contains q (case-insensitive), or whose phone contains its digits.
+    Ordered by name; one keyset page per call. Returns (clients, next_cursor or None).
+    Substring matches use the pg_trgm GIN indexes on name and phone_normalized.
+    """
+    q = q.strip()
+    if not q:
+        raise HTTPException(status_code=400, detail="Search query cannot be empty")
+
+    pattern = f"%{escape_like(q)}%"
+    conditions = [Client.name.ilike(pattern, escape="\\")]
+    digits = _NON_DIGITS.sub("", q)
+    if len(digits) >= MIN_PHONE_DIGITS:
+        conditions.append(Client.phone_normalized.like(f"%{digits}%"))
+
+    sort_key = (func.lower(Client.name), Client.id)
+    query = db.query(Client).filter(or_(*conditions))
+    if after:
+        name, client_id = decode_cursor(after, 2)
+        if not isinstance(name, str) or not isinstance(client_id, int):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        query = query.filter(tuple_(*sort_key) > (name, client_id))
+
+    rows = query.order_by(*sort_key).limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(rows[-1].name.lower(), rows[-1].id)
@@ -0,0 +1,105 @@
+from collections import defaultdict
+from typing import Iterable, Optional
+from sqlalchemy import case, func, or_, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+from app.models.appointment import Appointment, AppointmentStatus
+from app.models.client_stats import ClientStats
+
+COUNTER_COLUMNS = ["appointments", "visits", "no_shows", "cancellations", "total_paid"]
+
+def _add(deltas: dict, c, sign: int):
+    row = deltas[c.client_id]
+    row["appointments"] += sign
+    if c.status == AppointmentStatus.FINISHED:
+        row["visits"] += sign
+        if c.is_paid:
+            row["total_paid"] += sign * c.price
+    elif c.status == AppointmentStatus.NO_SHOW:
+        row["no_shows"] += sign
+    elif c.status == AppointmentStatus.CANCELLED:
+        row["cancellations"] += sign
+
+def _latest_other_visit(db: Session, client_id: int, exclude_ids: set):
+    # Core table on purpose: an ORM query would autoflush the pending appointment
+    # changes, and the overlap constraint must only fire in the caller's commit.
+    # The changed appointments are excluded, so their stored state does not matter.
+    appt = Appointment.__table__
+    return db.execute(select(func.max(appt.c.date)).where(
+        appt.c.client_id == client_id,
+        appt.c.status == AppointmentStatus.FINISHED,
+        appt.c.id.notin_(exclude_ids)
+    )).scalar()
+
+def record_changes(db: Session, changes: Iterable[tuple]):
+    """
+    Apply (before, after) appointment contributions (see app.services.rollup) to the
+    stats of their clients, in the caller's transaction. Appointments without a client are skipped.
+    last_visit only moves forward in the upsert; it is re-read when a visit is undone or moved back.
+    """
+    deltas = defaultdict(lambda: defaultdict(int))
+    added_visits = {}                  # client_id -> latest visit date added
+    undone_visits = defaultdict(set)   # client_id -> appointments whose visit was undone or moved back
+    for before, after in changes:
+        if before == after:
+            continue
+        for c, sign in ((before, -1), (after, 1)):
+            if c and c.client_id:
+                _add(deltas, c, sign)
+        if after and after.client_id and after.status == AppointmentStatus.FINISHED:
+            added_visits[after.client_id] = max(after.date, added_visits.get(after.client_id, after.date))
+        if before and before.client_id and before.status == AppointmentStatus.FINISHED and not (
+            after and after.client_id == before.client_id
+            and after.status == AppointmentStatus.FINISHED and after.date >= before.date
+        ):
+            undone_visits[before.client_id].add(before.appointment_id)
+
+    table = ClientStats.__table__
+    for client_id in deltas.keys() | added_visits.keys():
+        delta = {k: v for k, v in deltas[client_id].items() if v}
+        visit = added_visits.get(client_id)
+        if not delta and visit is None:
+            continue
+        stmt = pg_insert(table).values(
+            client_id=client_id, last_visit=visit, **{col: delta.get(col, 0) for col in COUNTER_COLUMNS}
+        )
+        set_ = {col: table.c[col] + stmt.excluded[col] for col in delta}
+        if visit is not None:
+            # GREATEST(last_visit, :visit), also when last_visit is NULL
+            set_["last_visit"] = case(
+                (or_(table.c.last_visit.is_(None), table.c.last_visit < stmt.excluded.last_visit), stmt.excluded.last_visit),
+                else_=table.c.last_visit
+            )
+        stmt = stmt.on_conflict_do_update(index_elements=["client_id"], set_=set_)
+        db.execute(stmt)
+
+    for client_id, appointment_ids in undone_visits.items():
+        # A few rows through ix_appointment_client_date
+        candidates = [d for d in (_latest_other_visit(db, client_id, appointment_ids), added_visits.get(client_id)) if d]
+        db.execute(table.update().where(table.c.client_id == client_id).values(
+            last_visit=max(candidates) if candidates else None
+        ))
+
+def rebuild_client_stats(db: Session) -> int:
+    """Recompute every client's stats from the appointment table. Returns the row count."""
+    finished = Appointment.status == AppointmentStatus.FINISHED
+    source = select(
+        Appointment.client_id,
+        func.count(),
+        func.sum(case((finished, 1), else_=0)),
+        func.sum(case((Appointment.status == AppointmentStatus.NO_SHOW, 1), else_=0)),
+        func.sum(case((Appointment.status == AppointmentStatus.CANCELLED, 1), else_=0)),
+        func.sum(case((finished & Appointment.is_paid, func.coalesce(Appointment.price, 0)), else_=0)),
+        func.max(case((finished, Appointment.date))),
+    ).where(
+        Appointment.client_id.isnot(None)
+    ).group_by(Appointment.client_id)
+
+    table = ClientStats.__table__
+    db.execute(table.delete())
+    result = db.execute(table.insert().from_select(["client_id"] + COUNTER_COLUMNS + ["last_visit"], source))
+    db.commit()
+    return result.rowcount
+
+def get_client_stats(db: Session, client_id: int) -> Optional[ClientStats]:
+    return db.get(ClientStats, client_id)
@@ -0,0 +1,117 @@
+import csv
+import enum
+import io
+import json
+from typing import Iterator, List
+from app.db.session import SessionLocal
+from app.models.appointment import Appointment
+from app.models.client import Client
+from app.models.service import Service
+from app.core.time import min_to_time
+from app.services.appointment_listing import filter_appointments, LISTING_ORDER
+
+class ExportFormat(str, enum.Enum):
+    CSV = "csv"
+    NDJSON = "ndjson"
+
+MEDIA_TYPES = {
+    ExportFormat.CSV: "text/csv; charset=utf-8",
+    ExportFormat.NDJSON: "application/x-ndjson",
+}
+
+# Rows fetched per round trip from the server-side cursor, and rows per chunk sent to the client
+FETCH_SIZE = 1000
+CHUNK_ROWS = 500
+
+APPOINTMENT_COLUMNS = [
+    "id", "date", "start_time", "end_time", "status", "service_id", "service_name", "price",
+    "is_paid", "staff_id", "client_id", "client_name", "client_phone", "note", "created_at",
+]
+CLIENT_COLUMNS = ["id", "name", "phone", "email", "created_at"]
+
+def _encode(fmt: ExportFormat, columns: List[str], rows: Iterator[dict]) -> Iterator[str]:
+    """Serialize rows as CSV (with header) or NDJSON, in chunks of CHUNK_ROWS."""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=columns) if fmt == ExportFormat.CSV else None
+    if writer:
+        writer.writeheader()
+
+    pending = 0
+    for row in rows:
+        if writer:
+            writer.writerow(row)
+        else:
+            buffer.write(json.dumps(row, default=str, ensure_ascii=False))
+            buffer.write("\n")
+        pending += 1
+        if pending >= CHUNK_ROWS:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+    if buffer.tell():
+        yield buffer.getvalue()
+
+def _stream(query, to_dict) -> Iterator[dict]:
+    # yield_per streams from a server-side cursor instead of buffering the whole result
+    for row in query.execution_options(yield_per=FETCH_SIZE):
+        yield to_dict(row)
+
+def export_appointments(fmt: ExportFormat, **filters) -> Iterator[str]:
+    """
+    Appointments in agenda order with their service name and the price stored when booked.
+    Opens its own session: the response body is produced after the request's dependencies have closed.
+    """
+    db = SessionLocal()
+    try:
+        query = db.query(
+            Appointment.id, Appointment.date, Appointment.start_min, Appointment.end_min, Appointment.status,
+            Appointment.service_id, Service.name.label("service_name"), Appointment.price,
+            Appointment.is_paid, Appointment.staff_id, Appointment.client_id, Appointment.client_name,
+            Appointment.client_phone, Appointment.note, Appointment.created_at
+        ).outerjoin(Service, Service.id == Appointment.service_id)
+        query = filter_appointments(query, **filters).order_by(*LISTING_ORDER)
+
+        def to_dict(r):
+            return {
+                "id": r.id,
+                "date": r.date.isoformat(),
+                "start_time": min_to_time(r.start_min),
+                "end_time": min_to_time(r.end_min),
+                "status": r.status.value,
+                "service_id": r.service_id,
+                "service_name": r.service_name,
+                "price": r.price,
+                "is_paid": r.is_paid,
+                "staff_id": r.staff_id,
+                "client_id": r.client_id,
+                "client_name": r.client_name,
+                "client_phone": r.client_phone,
+                "note": r.note,
+                "created_at": r.created_at.isoformat() if r.created_at else None,
+            }
+
+        yield from _encode(fmt, APPOINTMENT_COLUMNS, _stream(query, to_dict))
+    finally:
+        db.close()
+
+def export_clients(fmt: ExportFormat) -> Iterator[str]:
+    db = SessionLocal()
+    try:
+        query = db.query(Client.id, Client.name, Client.phone, Client.email, Client.created_at).order_by(Client.id)
+
+        def to_dict(r):
+            return {
+                "id": r.id,
+                "name": r.name,
+                "phone": r.phone,
+                "email": r.email,
+                "created_at": r.created_at.isoformat() if r.created_at else None,
+            }
+
+        yield from _encode(fmt, CLIENT_COLUMNS, _stream(query, to_dict))
+    finally:
+        db.close()
+
+def export_headers(name: str, fmt: ExportFormat) -> dict:
+    return {"Content-Disposition": f'attachment; filename="{name}.{fmt.value}"'}
@@ -0,0 +1,54 @@
+import threading
+import httpx
+from typing import Optional
+from app.core.config import settings
+
+# One pooled client per flavour for the whole process, so repeated messages reuse
+# TCP/TLS connections. Opened and closed by the app lifespan (app.main).
+_sync_client: Optional[httpx.Client] = None
+_async_client: Optional[httpx.AsyncClient] = None
+_lock = threading.Lock()
+
+def _timeout() -> httpx.Timeout:
+    return httpx.Timeout(
+        connect=settings.HTTP_CONNECT_TIMEOUT,
+        read=settings.HTTP_READ_TIMEOUT,
+        write=settings.HTTP_READ_TIMEOUT,
+        pool=settings.HTTP_CONNECT_TIMEOUT
+    )
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=settings.HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY
+    )
+
+def get_sync_client() -> httpx.Client:
+    """Shared client for the threadpool and scheduler. Created on first use outside the app (scripts)."""
+    global _sync_client
+    if _sync_client is None or _sync_client.is_closed:
+        with _lock:
+            if _sync_client is None or _sync_client.is_closed:
+                _sync_client = httpx.Client(timeout=_timeout(), limits=_limits())
+    return _sync_client
+
+def get_async_client() -> httpx.AsyncClient:
+    global _async_client
+    if _async_client is None or _async_client.is_closed:
+        _async_client = httpx.AsyncClient(timeout=_timeout(), limits=_limits())
+    return _async_client
+
+def open_clients():
+    get_sync_client()
+    get_async_client()
+
+async def close_clients():
+    global _sync_client, _async_client
+    if _async_client is not None:
+        await _async_client.aclose()
+        _async_client = None
+    with _lock:
+        if _sync_client is not None:
+            _sync_client.close()
+            _sync_client = None
@@ -0,0 +1,102 @@
+import hashlib
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.idempotency import IdempotencyKey
+
+logger = logging.getLogger(__name__)
+
+MAX_KEY_LENGTH = 255
+
+def request_hash(body: str) -> str:
+    return hashlib.sha256(body.encode()).hexdigest()
+
+def claim_key(db: Session, key: str, body_hash: str) -> Optional[JSONResponse]:
+    """
+    Reserve an Idempotency-Key before running the request (committed right away).
+    Returns the stored response when the key was already used for the same request,
+    None when the caller owns the key and must run the request and then call store_response.
+    """
+    if len(key) > MAX_KEY_LENGTH:
+        raise HTTPException(status_code=400, detail=f"Idempotency-Key cannot exceed {MAX_KEY_LENGTH} characters")
+
+    now = datetime.now(timezone.utc)
+    # An expired key is free again
+    db.query(IdempotencyKey).filter(IdempotencyKey.key == key, IdempotencyKey.expires_at <= now).delete()
+    db.add(IdempotencyKey(
+        key=key,
+        request_hash=body_hash,
+        expires_at=now + timedelta(hours=settings.IDEMPOTENCY_TTL_HOURS)
+    ))
+    try:
+        db.commit()
+        return None
+    except IntegrityError:
+        db.rollback()
+
+    # Someone else holds the key: a retry of a finished request, or one racing the first attempt
+    stored = db.query(IdempotencyKey).filter(IdempotencyKey.key == key).first()
+    if not stored:
+        # Purged between the insert and the read; the client can simply retry
+        raise HTTPException(status_code=409, detail="Idempotency-Key is being reset, retry the request")
+    if stored.request_hash != body_hash:
+        raise HTTPException(status_code=422, detail="Idempotency-Key was already used with a different request")
+    if stored.status_code is None:
+        raise HTTPException(status_code=409, detail="A request with this Idempotency-Key is still being processed")
+    return JSONResponse(
+        status_code=stored.status_code,
+        content=stored.response_body,
+        headers={"Idempotent-Replayed": "true"}
+    )
+
+def has_stored_response(key: Optional[str]) -> bool:
+    """
+    Whether the key belongs to a finished, unexpired request, i.e. the call will be a replay.
+    Opens its own session: it runs from the rate limiter, before the request's dependencies.
+    """
+    if not key or len(key) > MAX_KEY_LENGTH:
+        return False
+    db = SessionLocal()
+    try:
+        return db.query(IdempotencyKey.key).filter(
+            IdempotencyKey.key == key,
+            IdempotencyKey.status_code.isnot(None),
+            IdempotencyKey.expires_at > datetime.now(timezone.utc)
+        ).first() is not None
+    finally:
+        db.close()
+
+def store_response(db: Session, key: str, status_code: int, body) -> None:
+    db.query(IdempotencyKey).filter(IdempotencyKey.key == key).update(
+        {"status_code": status_code, "response_body": body},
+        synchronize_session=False
+    )
+    db.commit()
+
+def release_key(db: Session, key: str) -> None:
+    """Forget a key whose request failed unexpectedly, so a retry runs it again."""
+    db.rollback()
+    db.query(IdempotencyKey).filter(IdempotencyKey.key == key).delete()
+    db.commit()
+
+def purge_expired_keys() -> int:
+    """Delete expired idempotency keys. Runs from the scheduler."""
+    db = SessionLocal()
+    try:
+        deleted = db.query(IdempotencyKey).filter(
+            IdempotencyKey.expires_at <= datetime.now(timezone.utc)
+        ).delete(synchronize_session=False)
+        db.commit()
+        return deleted
+    except Exception as e:
+        logger.error(f"Error purging idempotency keys: {e}")
+        db.rollback()
+        return 0
+    finally:
+        db.close()
@@ -0,0 +1,130 @@
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.appointment import Appointment, AppointmentStatus
+from app.models.inbound_message import InboundMessage, InboundStatus
+from app.services.notifications import enqueue_whatsapp
+from app.services.appointment_service import invalidate_appointment_dates
+from app.services import rollup
+
+logger = logging.getLogger(__name__)
+
+# Replies only count for reminders sent within this window
+REPLY_WINDOW = timedelta(hours=48)
+
+def store_inbound_message(sender: Optional[str], body: str) -> Optional[int]:
+    """
+    Persist an inbound reply for the inbox worker. Blocking, call it from a worker thread.
+    Returns None without storing when the sender is not a usable phone number.
+    """
+    if not sender:
+        logger.warning(f"Mensaje entrante sin teléfono válido, ignorado: '{body}'")
+        return None
+
+    db = SessionLocal()
+    try:
+        message = InboundMessage(sender=sender, body=body)
+        db.add(message)
+        db.commit()
+        return message.id
+    finally:
+        db.close()
+
+def _apply_reply(db: Session, message: InboundMessage):
+    """
+    Confirm ("1") or cancel ("2") the sender's most recently reminded pending appointment.
+    Returns the appointment date when the agenda changed, otherwise None.
+    """
+    appt = db.query(Appointment).filter(
+        Appointment.client_phone_normalized == message.sender,
+        Appointment.status == AppointmentStatus.PENDING,
+        Appointment.confirmation_sent_at >= message.received_at - REPLY_WINDOW
+    ).order_by(Appointment.confirmation_sent_at.desc()).with_for_update().first()
+
+    if not appt:
+        logger.warning(f"No se encontró turno PENDING con recordatorio reciente para: {message.sender}")
+        return None
+
+    before = rollup.snapshot(appt)
+    if message.body == "1":
+        # CONFIRM
+        appt.status = AppointmentStatus.CONFIRMED
+        rollup.record_change(db, before, rollup.snapshot(appt))
+        
+        # Notify Client
+        confirm_msg = (f"✅ ¡Gracias {appt.client_name}! Tu turno ha sido CONFIRMADO. "
+                       f"Te esperamos el {appt.date} a las {appt.start_time}.")
+        enqueue_whatsapp(db, appt.client_phone, confirm_msg)
+        
+        # Notify Admin
+        if settings.ADMIN_PHONE:
+            admin_msg = (f"✅ Turno CONFIRMADO por cliente\n"
+                         f"👤 Cliente: {appt.client_name}\n"
+                         f"📅 Fecha: {appt.date}\n"
+                         f"🕒 Hora: {appt.start_time}")
+            enqueue_whatsapp(db, settings.ADMIN_PHONE, admin_msg)
+        return None
+
+    if message.body == "2":
+        # CANCEL
+        appt.status = AppointmentStatus.CANCELLED
+        rollup.record_change(db, before, rollup.snapshot(appt))
+        
+        # Notify Client
+        cancel_msg = f"Turno cancelado correctamente. ¡Esperamos verte pronto!"
+        enqueue_whatsapp(db, appt.client_phone, cancel_msg)
+        
+        # Notify Admin
+        if settings.ADMIN_PHONE:
+            admin_msg = (f"❌ Turno CANCELADO por cliente\n"
+                         f"👤 Cliente: {appt.client_name}\n"
+                         f"📅 Fecha: {appt.date}\n"
+                         f"🕒 Hora: {appt.start_time}")
+            enqueue_whatsapp(db, settings.ADMIN_PHONE, admin_msg)
+        return appt.date
+
+    return None
+
+def process_inbound_messages() -> int:
+    """
+    Apply pending inbox replies in arrival order. Runs from the scheduler.
+    Rows are locked with SKIP LOCKED; each message runs in its own savepoint so
+    one bad message is marked FAILED without losing the rest of the batch.
+    Returns the number of messages processed.
+    """
+    db = SessionLocal()
+    processed = 0
+    changed_dates = set()
+    try:
+        pending = db.query(InboundMessage).filter(
+            InboundMessage.status == InboundStatus.PENDING
+        ).order_by(InboundMessage.id).limit(
+            settings.INBOX_BATCH_SIZE
+        ).with_for_update(skip_locked=True).all()
+
+        for message in pending:
+            try:
+                with db.begin_nested():
+                    changed = _apply_reply(db, message)
+                if changed:
+                    changed_dates.add(changed)
+                message.status = InboundStatus.PROCESSED
+                processed += 1
+            except Exception as e:
+                logger.error(f"Inbound message {message.id} failed: {e}")
+                message.status = InboundStatus.FAILED
+                message.last_error = str(e)[:500]
+            message.processed_at = datetime.now(timezone.utc)
+
+        db.commit()
+        if changed_dates:
+            invalidate_appointment_dates(changed_dates)
+    except Exception as e:
+        logger.error(f"Error processing inbox: {e}")
+        db.rollback()
+    finally:
+        db.close()
+    return processed
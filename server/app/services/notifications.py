@@ -0,0 +1,111 @@
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.notification import NotificationOutbox, NotificationChannel, NotificationStatus
+from app.services.whatsapp import send_whatsapp_sync
+from app.services.telegram import send_telegram_sync
+
+logger = logging.getLogger(__name__)
+
+# Retries back off exponentially up to this ceiling
+MAX_RETRY_DELAY = timedelta(hours=1)
+# A claimed message is not picked up by another run for this long
+CLAIM_LEASE = timedelta(minutes=5)
+
+def enqueue_whatsapp(db: Session, to_phone: str, message: str) -> Optional[NotificationOutbox]:
+    """
+    Queue a WhatsApp message in the caller's transaction.
+    It is only delivered if that transaction commits.
+    """
+    if not settings.WHATSAPP_BRIDGE_URL:
+        return None
+    notification = NotificationOutbox(channel=NotificationChannel.WHATSAPP, recipient=to_phone, body=message)
+    db.add(notification)
+    return notification
+
+def enqueue_telegram(db: Session, message: str) -> Optional[NotificationOutbox]:
+    """
+    Queue an admin Telegram message in the caller's transaction.
+    """
+    if not settings.TELEGRAM_BOT_TOKEN or not settings.TELEGRAM_CHAT_ID:
+        return None
+    notification = NotificationOutbox(channel=NotificationChannel.TELEGRAM, body=message)
+    db.add(notification)
+    return notification
+
+def _deliver(notification: NotificationOutbox) -> bool:
+    if notification.channel == NotificationChannel.WHATSAPP:
+        return send_whatsapp_sync(notification.recipient, notification.body)
+    return send_telegram_sync(notification.body)
+
+def _retry_delay(attempts: int) -> timedelta:
+    delay = timedelta(seconds=settings.NOTIFICATION_RETRY_BASE_SECONDS * 2 ** (attempts - 1))
+    return min(delay, MAX_RETRY_DELAY)
+
+def _claim_due(db: Session) -> list:
+    """
+    Lock a batch of due messages with SKIP LOCKED, count the attempt and push next_attempt_at
+    past CLAIM_LEASE, then commit. The locks are released before any HTTP call; other runs
+    skip the batch until the lease expires (only if this process died mid-send).
+    """
+    now = datetime.now(timezone.utc)
+    due = db.query(NotificationOutbox).filter(
+        NotificationOutbox.status == NotificationStatus.PENDING,
+        NotificationOutbox.next_attempt_at <= now
+    ).order_by(NotificationOutbox.next_attempt_at, NotificationOutbox.id).limit(
+        settings.NOTIFICATION_BATCH_SIZE
+    ).with_for_update(skip_locked=True).all()
+
+    for notification in due:
+        notification.attempts += 1
+        notification.next_attempt_at = now + CLAIM_LEASE
+    db.commit()
+    return due
+
+def _record_result(db: Session, notification: NotificationOutbox, delivered: bool):
+    if delivered:
+        notification.status = NotificationStatus.SENT
+        notification.sent_at = datetime.now(timezone.utc)
+    elif notification.attempts >= settings.NOTIFICATION_MAX_ATTEMPTS:
+        notification.status = NotificationStatus.FAILED
+        notification.last_error = "Delivery failed, giving up"
+        logger.error(f"Notification {notification.id} ({notification.channel.value}) failed {notification.attempts} times, giving up")
+    else:
+        notification.next_attempt_at = datetime.now(timezone.utc) + _retry_delay(notification.attempts)
+        notification.last_error = "Delivery failed, will retry"
+        logger.warning(f"Notification {notification.id} ({notification.channel.value}) failed, retry at {notification.next_attempt_at}")
+    db.commit()
+
+def dispatch_pending_notifications() -> int:
+    """
+    Deliver due outbox messages. Runs from the scheduler, never inside a request.
+    Messages are claimed in one short transaction, then each one is sent and its
+    outcome committed on its own, so a failure never undoes the record of other sends.
+    Returns the number of messages sent.
+    """
+    db = SessionLocal()
+    sent = 0
+    try:
+        due = _claim_due(db)
+        for notification in due:
+            try:
+                delivered = _deliver(notification)
+            except Exception as e:
+                logger.error(f"Error sending notification {notification.id}: {e}")
+                delivered = False
+            try:
+                _record_result(db, notification, delivered)
+                sent += delivered
+            except Exception as e:
+                # The claim lease makes the message due again later
+                logger.error(f"Error recording notification {notification.id}: {e}")
+                db.rollback()
+    except Exception as e:
+        logger.error(f"Error dispatching notifications: {e}")
+        db.rollback()
+    finally:
+        db.close()
+    return sent
@@ -0,0 +1,65 @@
+from typing import Iterable, Optional, Tuple
+
+MINUTES_PER_DAY = 24 * 60
+
+def interval_mask(start: int, end: int) -> int:
+    """Bitmap with minutes [start, end) set."""
+    if end <= start:
+        return 0
+    return ((1 << (end - start)) - 1) << start
+
+def intervals_mask(intervals: Iterable[Tuple[int, int]]) -> int:
+    mask = 0
+    for start, end in intervals:
+        mask |= interval_mask(start, end)
+    return mask
+
+def window_starts(free: int, length: int) -> int:
+    """
+    Bitmap of every minute m such that [m, m + length) is entirely set in free.
+    Built with O(log length) shifts by doubling the tested run length.
+    """
+    result = -1
+    offset = 0
+    run = free  # bit m set <=> [m, m + step) all set
+    step = 1
+    while length:
+        if length & 1:
+            result &= run >> offset
+            offset += step
+        length >>= 1
+        if length:
+            run &= run >> step
+            step <<= 1
+    return result
+
+class DayOccupancy:
+    """
+    Minute-resolution occupancy of one (date, staff) agenda.
+    Bit m of open is set when minute m is inside an availability range,
+    bit m of busy when it is taken by a block or an active appointment.
+    """
+
+    def __init__(self, open_mask: int = 0, busy_mask: int = 0):
+        self.open = open_mask
+        self.busy = busy_mask
+
+    @classmethod
+    def build(cls, ranges: Iterable[Tuple[int, int]], busy: Iterable[Tuple[int, int]]) -> "DayOccupancy":
+        return cls(intervals_mask(ranges), intervals_mask(busy))
+
+    @property
+    def free(self) -> int:
+        return self.open & ~self.busy
+
+    def feasible_starts(self, duration: int) -> int:
+        """Bitmap of start minutes where a service of this duration fits entirely in free time."""
+        return window_starts(self.free, duration)
+
+    def fits(self, start: int, duration: int) -> bool:
+        window = interval_mask(start, start + duration)
+        return window != 0 and self.free & window == window
+
+    def is_clear(self, start: int, end: int) -> bool:
+        """True when [start, end) does not touch any busy minute (availability is not checked)."""
+        return self.busy & interval_mask(start, end) == 0
@@ -0,0 +1,164 @@
+import logging
+from collections import defaultdict
+from datetime import date
+from typing import Iterable, List, NamedTuple, Optional, Tuple
+from sqlalchemy import case, func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+from app.models.appointment import Appointment, AppointmentStatus
+from app.models.rollup import AppointmentDailyRollup
+from app.services import client_stats
+
+logger = logging.getLogger(__name__)
+
+STATUS_COLUMNS = {
+    AppointmentStatus.PENDING: "pending",
+    AppointmentStatus.CONFIRMED: "confirmed",
+    AppointmentStatus.CANCELLED: "cancelled",
+    AppointmentStatus.NO_SHOW: "no_show",
+    AppointmentStatus.FINISHED: "finished",
+}
+BOOKED_STATUSES = (AppointmentStatus.PENDING, AppointmentStatus.CONFIRMED, AppointmentStatus.FINISHED)
+COUNTER_COLUMNS = list(STATUS_COLUMNS.values()) + ["booked_min", "revenue_paid", "revenue_unpaid"]
+
+class Contribution(NamedTuple):
+    """What one appointment adds to its rollup row and to its client's stats."""
+    date: date
+    service_id: int
+    staff_id: int
+    client_id: Optional[int]
+    status: AppointmentStatus
+    is_paid: bool
+    minutes: int
+    price: float
+    appointment_id: Optional[int]  # None until a new appointment is flushed
+
+def snapshot(appt: Appointment) -> Contribution:
+    """Capture an appointment's rollup contribution; take one before and one after a change."""
+    return Contribution(
+        date=appt.date,
+        service_id=appt.service_id,
+        staff_id=appt.staff_id or 0,
+        client_id=appt.client_id,
+        status=AppointmentStatus(appt.status),
+        is_paid=bool(appt.is_paid),
+        minutes=appt.end_min - appt.start_min,
+        price=appt.price or 0.0,
+        appointment_id=appt.id,
+    )
+
+def _add(deltas: dict, c: Contribution, sign: int):
+    row = deltas[(c.date, c.service_id, c.staff_id)]
+    row[STATUS_COLUMNS[c.status]] += sign
+    if c.status in BOOKED_STATUSES:
+        row["booked_min"] += sign * c.minutes
+    if c.status == AppointmentStatus.FINISHED:
+        row["revenue_paid" if c.is_paid else "revenue_unpaid"] += sign * c.price
+
+def record_changes(db: Session, changes: Iterable[Tuple[Optional[Contribution], Optional[Contribution]]]):
+    """
+    Apply (before, after) snapshot pairs to the rollup and the client stats inside the
+    caller's transaction. None stands for "did not exist" (create) or "no longer exists" (delete).
+    Deltas are merged per row and written with one upsert each.
+    """
+    changes = list(changes)
+    deltas = defaultdict(lambda: defaultdict(int))
+    for before, after in changes:
+        if before == after:
+            continue
+        if before:
+            _add(deltas, before, -1)
+        if after:
+            _add(deltas, after, 1)
+
+    table = AppointmentDailyRollup.__table__
+    for (day, service_id, staff_id), delta in deltas.items():
+        delta = {k: v for k, v in delta.items() if v}
+        if not delta:
+            continue
+        stmt = pg_insert(table).values(
+            date=day, service_id=service_id, staff_id=staff_id,
+            **{col: delta.get(col, 0) for col in COUNTER_COLUMNS}
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["date", "service_id", "staff_id"],
+            set_={col: table.c[col] + stmt.excluded[col] for col in delta}
+        )
+        db.execute(stmt)
+
+    client_stats.record_changes(db, changes)
+
+def record_change(db: Session, before: Optional[Contribution], after: Optional[Contribution]):
+    record_changes(db, [(before, after)])
+
+def rebuild_rollup(db: Session) -> int:
+    """Recompute the whole rollup from the appointment table (backfill / repair). Returns the row count."""
+    finished = Appointment.status == AppointmentStatus.FINISHED
+    price = func.coalesce(Appointment.price, 0)
+    source = select(
+        Appointment.date,
+        Appointment.service_id,
+        func.coalesce(Appointment.staff_id, 0),
+        *[func.sum(case((Appointment.status == status, 1), else_=0)) for status in STATUS_COLUMNS],
+        func.sum(case((Appointment.status.in_(BOOKED_STATUSES), Appointment.end_min - Appointment.start_min), else_=0)),
+        func.sum(case((finished & Appointment.is_paid, price), else_=0)),
+        func.sum(case((finished & ~Appointment.is_paid, price), else_=0)),
+    ).group_by(
+        Appointment.date, Appointment.service_id, func.coalesce(Appointment.staff_id, 0)
+    )
+
+    table = AppointmentDailyRollup.__table__
+    db.execute(table.delete())
+    result = db.execute(table.insert().from_select(
+        ["date", "service_id", "staff_id"] + COUNTER_COLUMNS, source
+    ))
+    db.commit()
+    return result.rowcount
+
+def summarize(
+    db: Session,
+    start_date: date,
+    end_date: date,
+    period: str = "day",
+    group_by: Optional[str] = None,
+    service_id: Optional[int] = None,
+    staff_id: Optional[int] = None
+) -> List[dict]:
+    """
+    Totals per day or month (optionally per service or staff) read from the rollup only.
+    staff_id=0 selects the general agenda; it is reported as null.
+    """
+    query = db.query(AppointmentDailyRollup).filter(
+        AppointmentDailyRollup.date >= start_date,
+        AppointmentDailyRollup.date <= end_date
+    )
+    if service_id is not None:
+        query = query.filter(AppointmentDailyRollup.service_id == service_id)
+    if staff_id is not None:
+        query = query.filter(AppointmentDailyRollup.staff_id == staff_id)
+
+    totals = {}
+    for row in query.order_by(AppointmentDailyRollup.date).all():
+        key_period = row.date.strftime("%Y-%m") if period == "month" else row.date.isoformat()
+        key = (
+            key_period,
+            row.service_id if group_by == "service" else None,
+            (row.staff_id or None) if group_by == "staff" else None,
+        )
+        entry = totals.get(key)
+        if entry is None:
+            entry = totals[key] = {"period": key[0], "service_id": key[1], "staff_id": key[2], **{c: 0 for c in COUNTER_COLUMNS}}
+        for col in COUNTER_COLUMNS:
+            entry[col] += getattr(row, col)
+
+    return [totals[k] for k in sorted(totals, key=lambda k: (k[0], k[1] or 0, k[2] or 0))]
+
+if __name__ == "__main__":
+    from app.db.session import SessionLocal
+    logging.basicConfig(level=logging.INFO)
+    session = SessionLocal()
+    try:
+        logger.info(f"Rollup rebuilt: {rebuild_rollup(session)} rows")
+        logger.info(f"Client stats rebuilt: {client_stats.rebuild_client_stats(session)} rows")
+    finally:
+        session.close()
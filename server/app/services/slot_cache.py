@@ -0,0 +1,80 @@
+import threading
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
+from typing import Iterable, List, Optional
+from app.core.config import settings
+from app.core.time import get_current_time, tz, hhmm_to_min
+
+class SlotCache:
+    """
+    Process-local LRU cache of generate_slots_async results keyed by (date, service_id, staff_id).
+
+    Writers invalidate the dates they touch after committing. Every
+    invalidation bumps a generation counter so a result computed from
+    data read before the write is never stored afterwards.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def generation(self) -> int:
+        return self._generation
+
+    def get(self, target_date: date, service_id: int, staff_id: Optional[int]) -> Optional[List[dict]]:
+        key = (target_date, service_id, staff_id)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            slots, expires_at = entry
+            if expires_at is not None and get_current_time() >= expires_at:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return slots
+
+    def set(self, target_date: date, service_id: int, staff_id: Optional[int], slots: List[dict], generation: int):
+        # Slots already starting in the past are dropped by the slot generator, so the
+        # entry stays exact only until the current minute passes its first slot.
+        expires_at = None
+        if slots:
+            first_start = hhmm_to_min(slots[0]["start_time"])
+            expires_at = tz.localize(datetime.combine(target_date, datetime.min.time())) + timedelta(minutes=first_start + 1)
+
+        key = (target_date, service_id, staff_id)
+        with self._lock:
+            if generation != self._generation:
+                return
+            self._entries[key] = (slots, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate_dates(self, dates: Iterable[date]):
+        dates = set(dates)
+        with self._lock:
+            self._generation += 1
+            for key in [k for k in self._entries if k[0] in dates]:
+                del self._entries[key]
+
+    def invalidate_date_range(self, start_date: date, end_date: date):
+        with self._lock:
+            self._generation += 1
+            for key in [k for k in self._entries if start_date <= k[0] <= end_date]:
+                del self._entries[key]
+
+    def invalidate_service(self, service_id: int):
+        with self._lock:
+            self._generation += 1
+            for key in [k for k in self._entries if k[1] == service_id]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+slot_cache = SlotCache(settings.SLOT_CACHE_SIZE)
@@ -1,152 +1,371 @@
+from collections import defaultdict
 from datetime import datetime, date, timedelta, time
-from sqlalchemy.orm import Session
-from sqlalchemy import or_
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy import or_, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from app.models.availability import AvailabilityDay, AvailabilityRange
 from app.models.block import Block
 from app.models.appointment import Appointment, AppointmentStatus
-from app.models.service import Service
-from app.core.time import get_current_time, tz
+from app.models.staff import Staff
+from app.core.time import get_current_time, tz, time_to_min, min_to_time
+from app.services.slot_cache import slot_cache
+from app.services.occupancy import DayOccupancy
+from app.services.catalog import get_service_async
 import pytz
 
 # Defaults
-DEFAULT_RANGES = [
-    ("10:00", "13:00"),
-    ("14:45", "21:30")
-]
 DEFAULT_SLOT_SIZE = 45
 
-def parse_time(t_str: str) -> time:
-    h, m = map(int, t_str.split(':'))
-    return time(h, m)
+ACTIVE_STATUSES = [AppointmentStatus.PENDING, AppointmentStatus.CONFIRMED, AppointmentStatus.FINISHED]
 
-def time_to_min(t: time) -> int:
-    return t.hour * 60 + t.minute
+def _staff_filter(column, staff_ids: List[Optional[int]]):
+    # A None entry means the general (no specific staff) agenda
+    ids = [s for s in staff_ids if s]
+    conditions = []
+    if ids:
+        conditions.append(column.in_(ids))
+    if len(ids) < len(staff_ids):
+        conditions.append(column.is_(None))
+    return or_(*conditions)
 
-def min_to_time(m: int) -> str:
-    h = m // 60
-    mm = m % 60
-    return f"{h:02d}:{mm:02d}"
+class _Window:
+    """Availability, blocks and active appointments of one or more agendas over a date window."""
 
-def is_overlapping(start1, end1, start2, end2):
-    # (StartA < EndB) and (EndA > StartB)
-    return max(start1, start2) < min(end1, end2)
+    def __init__(self, days, blocks, appts):
+        self.days = days      # (staff_id, date) -> AvailabilityDay
+        self.blocks = blocks  # [(staff_id, start_date, end_date, (start_min, end_min))]
+        self.appts = appts    # (staff_id, date) -> [(start_min, end_min)]
 
-def generate_slots(
+    def avail_day(self, staff_id: Optional[int], day: date) -> Optional[AvailabilityDay]:
+        return self.days.get((staff_id or None, day))
+
+    def occupancy(self, staff_id: Optional[int], day: date) -> Optional[DayOccupancy]:
+        staff_id = staff_id or None
+        avail_day = self.avail_day(staff_id, day)
+        # If no config found, the day is considered closed
+        if not avail_day or not avail_day.enabled:
+            return None
+        # General blocks (no staff) apply to every agenda
+        busy = [
+            iv for b_staff, b_start, b_end, iv in self.blocks
+            if b_start <= day <= b_end and (b_staff is None or b_staff == staff_id)
+        ]
+        busy.extend(self.appts.get((staff_id, day), []))
+        return DayOccupancy.build(((r.start_min, r.end_min) for r in avail_day.ranges), busy)
+
+def _window_statements(
+    start_date: date,
+    end_date: date,
+    staff_ids: List[Optional[int]],
+    with_appointments: bool = True
+):
+    """
+    select() statements for the availability (with ranges), blocks and active
+    appointment intervals of the given agendas over [start_date, end_date].
+    Shared by the sync and async loaders.
+    """
+    days = select(AvailabilityDay).options(selectinload(AvailabilityDay.ranges)).where(
+        AvailabilityDay.date >= start_date,
+        AvailabilityDay.date <= end_date,
+        _staff_filter(AvailabilityDay.staff_id, staff_ids)
+    )
+    blocks = select(Block.staff_id, Block.start_date, Block.end_date, Block.start_min, Block.end_min).where(
+        Block.start_date <= end_date,
+        Block.end_date >= start_date,
+        _staff_filter(Block.staff_id, list(staff_ids) + [None])
+    )
+    appts = None
+    if with_appointments:
+        appts = select(Appointment.staff_id, Appointment.date, Appointment.start_min, Appointment.end_min).where(
+            Appointment.date >= start_date,
+            Appointment.date <= end_date,
+            Appointment.status.in_(ACTIVE_STATUSES),
+            _staff_filter(Appointment.staff_id, staff_ids)
+        )
+    return days, blocks, appts
+
+def _build_window(avail_days, block_rows, appt_rows) -> _Window:
+    days = {(d.staff_id, d.date): d for d in avail_days}
+    blocks = [(b.staff_id, b.start_date, b.end_date, (b.start_min, b.end_min)) for b in block_rows]
+    appts = defaultdict(list)
+    for a in appt_rows:
+        appts[(a.staff_id, a.date)].append((a.start_min, a.end_min))
+    return _Window(days, blocks, appts)
+
+def _load_window(
+    db: Session,
+    start_date: date,
+    end_date: date,
+    staff_ids: List[Optional[int]],
+    with_appointments: bool = True
+) -> _Window:
+    """
+    Load availability (with ranges), blocks and active appointment intervals
+    of the given agendas for [start_date, end_date] with one query each.
+    """
+    days, blocks, appts = _window_statements(start_date, end_date, staff_ids, with_appointments)
+    return _build_window(
+        db.execute(days).scalars().all(),
+        db.execute(blocks).all(),
+        db.execute(appts).all() if appts is not None else []
+    )
+
+async def _load_window_async(
+    db: AsyncSession,
+    start_date: date,
+    end_date: date,
+    staff_ids: List[Optional[int]],
+    with_appointments: bool = True
+) -> _Window:
+    days, blocks, appts = _window_statements(start_date, end_date, staff_ids, with_appointments)
+    return _build_window(
+        (await db.execute(days)).scalars().all(),
+        (await db.execute(blocks)).all(),
+        (await db.execute(appts)).all() if appts is not None else []
+    )
+
+def load_day_occupancy(
     db: Session,
     target_date: date,
+    staff_id: Optional[int] = None,
+    with_appointments: bool = True
+) -> Optional[DayOccupancy]:
+    """
+    Occupancy bitmap of one (date, staff) agenda, or None when the day is closed.
+    with_appointments=False leaves appointments out (availability and blocks only).
+    """
+    window = _load_window(db, target_date, target_date, [staff_id], with_appointments)
+    return window.occupancy(staff_id, target_date)
+
+def _compute_day_slots(
+    avail_day: Optional[AvailabilityDay],
+    occupancy: Optional[DayOccupancy],
+    duration: int,
+    now_minutes: int = -1
+) -> List[dict]:
+    """
+    Build the free slots of a single day from its occupancy bitmap.
+    now_minutes >= 0 means the day is today and earlier slots are skipped.
+    """
+    if occupancy is None:
+        return []
+
+    slot_size = avail_day.slot_size_min or DEFAULT_SLOT_SIZE
+    # One sliding-window pass over the whole day, then a bit test per candidate
+    feasible = occupancy.feasible_starts(duration)
+    if now_minutes > 0:
+        feasible &= ~((1 << now_minutes) - 1)
+    if not feasible:
+        return []
+
+    final_slots = []
+    for r in avail_day.ranges:
+        # Slots stay aligned to the grid of their own range
+        for s_start in range(r.start_min, r.end_min - duration + 1, slot_size):
+            if (feasible >> s_start) & 1:
+                final_slots.append({
+                    "start_time": min_to_time(s_start),
+                    "end_time": min_to_time(s_start + duration)
+                })
+
+    return final_slots
+
+def _range_slots(
+    window: _Window,
+    start_date: date,
+    end_date: date,
+    staff_id: Optional[int],
+    duration: int,
+    current_time: datetime
+) -> List[dict]:
+    today = current_time.date()
+    now_minutes = time_to_min(current_time.time())
+    result = []
+    day = start_date
+    while day <= end_date:
+        slots = _compute_day_slots(
+            window.avail_day(staff_id, day),
+            window.occupancy(staff_id, day),
+            duration,
+            now_minutes if day == today else -1
+        )
+        result.append({"date": day, "slots": slots})
+        day += timedelta(days=1)
+    return result
+
+async def generate_slots_range_async(
+    db: AsyncSession,
+    start_date: date,
+    end_date: date,
     service_id: int,
     staff_id: Optional[int] = None
 ) -> List[dict]:
-    # 1. Get Service Duration
-    service = db.query(Service).filter(Service.id == service_id).first()
+    """
+    Compute the free slots of every day in [start_date, end_date].
+    Availability, ranges, blocks and appointments for the whole window are
+    loaded with one query each, so the cost does not grow with the number of days.
+    Returns [{"date": date, "slots": [...]}, ...] for every non-past day.
+    """
+    service = await get_service_async(db, service_id)
     if not service:
         return []
-    duration = service.duration_min
 
-
-    # 2. Get Availability
-    # Check if date is in the past
+    # Past days never have slots
     current_time = get_current_time()
-    if target_date < current_time.date():
-        return []
-        
-    # Check if specific day config exists
-    query = db.query(AvailabilityDay).filter(AvailabilityDay.date == target_date)
-    if staff_id:
-        query = query.filter(AvailabilityDay.staff_id == staff_id)
-    else:
-        query = query.filter(AvailabilityDay.staff_id.is_(None))
-    
-    avail_day = query.first()
-
-    # If looking at today, we must filter out passed time
-    is_today = (target_date == current_time.date())
-    now_minutes = time_to_min(current_time.time()) if is_today else -1
-
-    ranges = []
-    slot_size = DEFAULT_SLOT_SIZE
-    
-    if avail_day:
-        if not avail_day.enabled:
-            return []
-        slot_size = avail_day.slot_size_min
-        for r in avail_day.ranges:
-            ranges.append((r.start_time, r.end_time))
-    else:
-        # If no config found, the day is considered closed
+    start_date = max(start_date, current_time.date())
+    if end_date < start_date:
         return []
 
-    # 3. Generate Candidate Slots
-    candidates = []
-    
-    for r_start, r_end in ranges:
-        start_min = time_to_min(parse_time(r_start))
-        end_min = time_to_min(parse_time(r_end))
-        
-        curr = start_min
-        while curr + duration <= end_min:
-            s_start = curr
-            s_end = curr + duration
-            
-            # Check past
-            if is_today and s_start < now_minutes:
-                curr += slot_size
-                continue
-
-            candidates.append({"start": s_start, "end": s_end})
-            curr += slot_size
-
-    if not candidates:
+    window = await _load_window_async(db, start_date, end_date, [staff_id])
+    return _range_slots(window, start_date, end_date, staff_id, service.duration_min, current_time)
+
+async def generate_slots_async(
+    db: AsyncSession,
+    target_date: date,
+    service_id: int,
+    staff_id: Optional[int] = None
+) -> List[dict]:
+    if target_date < get_current_time().date():
         return []
 
-    # 4. Fetch Blocks and Appointments to filter
-    blocks_query = db.query(Block).filter(Block.start_date <= target_date, Block.end_date >= target_date)
-    if staff_id:
-        blocks_query = blocks_query.filter(or_(Block.staff_id == staff_id, Block.staff_id.is_(None)))
-    else:
-        blocks_query = blocks_query.filter(Block.staff_id.is_(None))
-    blocks = blocks_query.all()
-
-    # Appointments
-    appts_query = db.query(Appointment).filter(
-        Appointment.date == target_date,
-        Appointment.status.in_([AppointmentStatus.PENDING, AppointmentStatus.CONFIRMED, AppointmentStatus.FINISHED])
+    cached = slot_cache.get(target_date, service_id, staff_id)
+    if cached is not None:
+        return cached
+
+    generation = slot_cache.generation()
+    days = await generate_slots_range_async(db, target_date, target_date, service_id, staff_id)
+    slots = days[0]["slots"] if days else []
+    slot_cache.set(target_date, service_id, staff_id, slots, generation)
+    return slots
+
+# Next-available search: days loaded per round trip and how far ahead to look
+NEXT_WINDOW_DAYS = 14
+NEXT_MAX_DAYS = 180
+
+def _open_days_statement(today: date, staff_id: Optional[int]):
+    # Nothing can be free outside the open days still ahead
+    return select(func.min(AvailabilityDay.date), func.max(AvailabilityDay.date)).where(
+        AvailabilityDay.date >= today,
+        AvailabilityDay.enabled == True,
+        _staff_filter(AvailabilityDay.staff_id, [staff_id])
     )
-    if staff_id:
-        appts_query = appts_query.filter(Appointment.staff_id == staff_id)
-    else:
-        appts_query = appts_query.filter(Appointment.staff_id.is_(None))
-    appts = appts_query.all()
 
-    final_slots = []
-    for slot in candidates:
-        conflict = False
-        s_s = slot["start"]
-        s_e = slot["end"]
-
-        # Check Blocks
-        for b in blocks:
-            b_s = time_to_min(parse_time(b.start_time))
-            b_e = time_to_min(parse_time(b.end_time))
-            if is_overlapping(s_s, s_e, b_s, b_e):
-                conflict = True
-                break
-        
-        if conflict: continue
-
-        # Check Appts
-        for a in appts:
-            a_s = time_to_min(parse_time(a.start_time))
-            a_e = time_to_min(parse_time(a.end_time))
-            if is_overlapping(s_s, s_e, a_s, a_e):
-                conflict = True
-                break
-        
-        if not conflict:
-            final_slots.append({
-                "start_time": min_to_time(s_s),
-                "end_time": min_to_time(s_e)
-            })
+def _next_windows(first_day: Optional[date], last_day: Optional[date], today: date):
+    """[(window_start, window_end), ...] of NEXT_WINDOW_DAYS days up to the search horizon."""
+    if not first_day:
+        return []
+    horizon = min(last_day, today + timedelta(days=NEXT_MAX_DAYS))
+    windows = []
+    window_start = first_day
+    while window_start <= horizon:
+        window_end = min(window_start + timedelta(days=NEXT_WINDOW_DAYS - 1), horizon)
+        windows.append((window_start, window_end))
+        window_start = window_end + timedelta(days=1)
+    return windows
 
-    return final_slots
+def _collect_next(
+    window: _Window,
+    window_start: date,
+    window_end: date,
+    staff_id: Optional[int],
+    duration: int,
+    current_time: datetime,
+    found: List[dict],
+    limit: int
+):
+    today = current_time.date()
+    now_minutes = time_to_min(current_time.time())
+    day = window_start
+    while day <= window_end and len(found) < limit:
+        slots = _compute_day_slots(
+            window.avail_day(staff_id, day),
+            window.occupancy(staff_id, day),
+            duration,
+            now_minutes if day == today else -1
+        )
+        for slot in slots[:limit - len(found)]:
+            found.append({"date": day, **slot})
+        day += timedelta(days=1)
+
+async def find_next_slots_async(
+    db: AsyncSession,
+    service_id: int,
+    staff_id: Optional[int] = None,
+    limit: int = 5
+) -> List[dict]:
+    """
+    Earliest free slots from now on, scanning forward in windows of NEXT_WINDOW_DAYS
+    (one bulk load per window) and stopping as soon as limit slots are found.
+    Returns [{"date": date, "start_time": ..., "end_time": ...}, ...] in chronological order.
+    """
+    service = await get_service_async(db, service_id)
+    if not service:
+        return []
+
+    current_time = get_current_time()
+    first_day, last_day = (await db.execute(_open_days_statement(current_time.date(), staff_id))).one()
+
+    found = []
+    for window_start, window_end in _next_windows(first_day, last_day, current_time.date()):
+        if len(found) >= limit:
+            break
+        window = await _load_window_async(db, window_start, window_end, [staff_id])
+        _collect_next(window, window_start, window_end, staff_id, service.duration_min, current_time, found, limit)
+    return found
+
+ANY_STAFF = "any"
+
+def _active_staff_statement():
+    return select(Staff.id).where(Staff.active == True).order_by(Staff.id)
+
+def _merge_staff_slots(
+    window: _Window,
+    target_date: date,
+    staff_ids: List[int],
+    duration: int,
+    current_time: datetime
+) -> List[dict]:
+    now_minutes = time_to_min(current_time.time()) if target_date == current_time.date() else -1
+
+    by_start = {}
+    for sid in staff_ids:
+        for slot in _compute_day_slots(
+            window.avail_day(sid, target_date),
+            window.occupancy(sid, target_date),
+            duration,
+            now_minutes
+        ):
+            entry = by_start.setdefault(slot["start_time"], {**slot, "staff_ids": []})
+            entry["staff_ids"].append(sid)
+
+    return [by_start[k] for k in sorted(by_start)]
+
+async def generate_slots_any_staff_async(
+    db: AsyncSession,
+    target_date: date,
+    service_id: int
+) -> List[dict]:
+    """
+    Union of the free slots of every active staff member for one day.
+    Each slot lists the staff_ids that can take it.
+    All agendas are loaded together, so the query count does not depend on the staff size.
+    """
+    current_time = get_current_time()
+    if target_date < current_time.date():
+        return []
+
+    cached = slot_cache.get(target_date, service_id, ANY_STAFF)
+    if cached is not None:
+        return cached
+
+    generation = slot_cache.generation()
+    service = await get_service_async(db, service_id)
+    staff_ids = (await db.execute(_active_staff_statement())).scalars().all()
+    if not service or not staff_ids:
+        return []
+
+    window = await _load_window_async(db, target_date, target_date, staff_ids)
+    slots = _merge_staff_slots(window, target_date, staff_ids, service.duration_min, current_time)
+    slot_cache.set(target_date, service_id, ANY_STAFF, slots, generation)
+    return slots
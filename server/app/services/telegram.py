@@ -1,7 +1,7 @@
-import httpx
 import logging
 from typing import Optional
 from app.core.config import settings
+from app.services.http_clients import get_sync_client, get_async_client
 logger = logging.getLogger(__name__)
 
 async def send_telegram_message(message: str):
@@ -19,14 +19,13 @@ async def send_telegram_message(message: str):
         "parse_mode": "HTML"
     }
 
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.post(url, json=payload)
-            response.raise_for_status()
-            return True
-        except Exception as e:
-            logger.error(f"Failed to send Telegram message: {str(e)}")
-            return False
+    try:
+        response = await get_async_client().post(url, json=payload)
+        response.raise_for_status()
+        return True
+    except Exception as e:
+        logger.error(f"Failed to send Telegram message: {str(e)}")
+        return False
 
 def send_telegram_sync(message: str):
     """
@@ -43,10 +42,9 @@ def send_telegram_sync(message: str):
     }
 
     try:
-        with httpx.Client() as client:
-            response = client.post(url, json=payload)
-            response.raise_for_status()
-            return True
+        response = get_sync_client().post(url, json=payload)
+        response.raise_for_status()
+        return True
     except Exception as e:
         logger.error(f"Failed to send Telegram (sync): {str(e)}")
         return False
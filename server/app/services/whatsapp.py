@@ -1,7 +1,7 @@
-import httpx
 import logging
 from typing import Optional
 from app.core.config import settings
+from app.services.http_clients import get_sync_client, get_async_client
 logger = logging.getLogger(__name__)
 
 async def send_whatsapp_message(to_phone: str, message: str):
@@ -20,15 +20,14 @@ async def send_whatsapp_message(to_phone: str, message: str):
         "body": message
     }
     
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.post(url, json=payload)
-            response.raise_for_status()
-            logger.info(f"WhatsApp message sent to {clean_phone} via bridge")
-            return True
-        except Exception as e:
-            logger.error(f"Failed to send WhatsApp message via bridge: {str(e)}")
-            return False
+    try:
+        response = await get_async_client().post(url, json=payload)
+        response.raise_for_status()
+        logger.info(f"WhatsApp message sent to {clean_phone} via bridge")
+        return True
+    except Exception as e:
+        logger.error(f"Failed to send WhatsApp message via bridge: {str(e)}")
+        return False
 
 def send_whatsapp_sync(to_phone: str, message: str):
     """
@@ -46,10 +45,9 @@ def send_whatsapp_sync(to_phone: str, message: str):
     }
 
     try:
-        with httpx.Client() as client:
-            response = client.post(url, json=payload, timeout=10.0)
-            response.raise_for_status()
-            return True
+        response = get_sync_client().post(url, json=payload)
+        response.raise_for_status()
+        return True
     except Exception as e:
         logger.error(f"Failed to send WhatsApp (sync) via bridge: {str(e)}")
         return False
@@ -0,0 +1,20 @@
+from app.services.appointment_service import _find_overlaps
+
+def test_row_starts_inside_stored_appointment():
+    assert _find_overlaps([(630, 675, 0, None), (600, 645, None, 17)]) == {0: "Overlaps appointment #17"}
+
+def test_row_starts_before_stored_appointment():
+    assert _find_overlaps([(600, 645, 0, None), (630, 675, None, 17)]) == {0: "Overlaps appointment #17"}
+
+def test_rows_overlapping_each_other():
+    assert _find_overlaps([(600, 645, 0, None), (630, 675, 1, None)]) == {1: "Overlaps row 0"}
+
+def test_adjacent_intervals_do_not_overlap():
+    assert _find_overlaps([(600, 645, 0, None), (645, 690, None, 17), (690, 735, 1, None)]) == {}
+
+if __name__ == "__main__":
+    test_row_starts_inside_stored_appointment()
+    test_row_starts_before_stored_appointment()
+    test_rows_overlapping_each_other()
+    test_adjacent_intervals_do_not_overlap()
+    print("OK")